@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from parser import ZzerParser, ProductCollector, AdaptiveRateLimiter, LIST_PAGES_SCRIPT, DETAIL_BATCH_SCRIPT
+
+
+BENCH_CONFIG = {
+    'api': {
+        'base_url': 'https://gwapi-v2.goshare2.com',
+        'endpoints': {
+            'product_list': '/esbiz/api/v1/product/panHuo/productList',
+            'brand_products': '/esbiz/api/v1/product/brand/productList'
+        },
+        'image_cdn': 'https://img.goshare2.com'
+    },
+    'device': {
+        'deviceId': 'bench',
+        'h5Version': '5.14.11',
+        'version': '7.45.0',
+        'fmt': 'json',
+        'langType': 'zh',
+        'mpb': 'bench',
+        'mpm': 'bench',
+        'mt': 'bench',
+        'plat': 1
+    },
+    'parsing': {
+        'max_products': 0,
+        'page_size': 20,
+        'batch_size': 50,
+        'detail_concurrency': 4,
+        'detail_batch_size': 10
+    },
+    'metrics': {
+        'enabled': False
+    },
+    'tasks': [
+        {
+            'name': 'Benchmark',
+            'enabled': True,
+            'brand_name': 'Chanel',
+            'endpoint': 'brand_products',
+            'payload': {'brandId': 'bench', 'page': 1, 'size': 20}
+        }
+    ]
+}
+
+NAMES = ['Classic Flap', 'Boy', 'Vanity Case', '19', 'Gabrielle', 'Deauville', '22']
+NAME_SUFFIXES = ['牛皮菱格链条包', '羊皮单肩包', '牛仔布双C标识斜挎包', '斜挎包', '手提包', '托特包']
+MATERIALS = ['牛皮', '羊皮', '牛仔布', '帆布', '漆皮']
+ACCESSORIES = ['防尘袋', '盒子', '钥匙', '小锁', '说明书', '卡片', '保卡']
+DEGREES = ['9.5新', '9新', '全新', '8.5新']
+CITIES = ['Hong Kong', 'Shanghai', 'Beijing', 'Shenzhen']
+
+
+class StubTranslator:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+    
+    def translate(self, text):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return '\n'.join(f"ru:{line}" for line in text.split('\n'))
+
+
+class Fixtures:
+    def __init__(self, list_pages, details):
+        self.list_pages = list_pages
+        self.details = details
+    
+    @classmethod
+    def synthesize(cls, count, page_size=20, seed=42):
+        rng = random.Random(seed)
+        items = []
+        details = {}
+        
+        for i in range(count):
+            product_id = str(2350645226458865669 + i)
+            sku = str(251118781531628 + i)
+            items.append({
+                'product': {
+                    'id': product_id,
+                    'sku': sku,
+                    'name': f"{rng.choice(NAMES)}{rng.choice(NAME_SUFFIXES)}",
+                    'brandName': 'Chanel',
+                    'degreeName': rng.choice(DEGREES),
+                    'sizeName': rng.choice(['', 'S', 'M', '36']),
+                    'price': rng.randint(1000, 60000),
+                    'originalPrice': rng.randint(1000, 60000),
+                    'ico': f"product/{product_id}/main.jpg"
+                }
+            })
+            details[product_id] = {
+                'code': 100000,
+                'data': {
+                    'detail': {
+                        'storeTextEn': rng.choice(CITIES),
+                        'imageList': [f"product/{product_id}/{n}.jpg" for n in range(rng.randint(3, 9))]
+                    },
+                    'productAttr': [
+                        {'name': '系列', 'values': [{'value': rng.choice(NAMES)}]},
+                        {'name': '序列号', 'values': [{'value': f"{rng.randint(10000000, 99999999)}｜{rng.randint(2015, 2024)}"}]},
+                        {'name': '材质', 'values': [{'value': rng.choice(MATERIALS)}]},
+                        {'name': '整体重量', 'values': [f"{rng.randint(200, 1500)}g"]},
+                        {'name': '配件', 'values': rng.sample(ACCESSORIES, rng.randint(1, 4))}
+                    ]
+                }
+            }
+        
+        list_pages = []
+        for start in range(0, count, page_size):
+            list_pages.append({'code': 100000, 'data': {'list': items[start:start + page_size]}})
+        if count % page_size == 0:
+            list_pages.append({'code': 100000, 'data': {'list': []}})
+        
+        return cls(list_pages, details)
+    
+    @classmethod
+    def load(cls, directory, count):
+        directory = Path(directory)
+        list_pages = []
+        for path in sorted(directory.glob('product_list/*.json')):
+            with open(path, 'r', encoding='utf-8') as f:
+                list_pages.append(json.load(f))
+        
+        details = {}
+        for path in directory.glob('detail/*.json'):
+            with open(path, 'r', encoding='utf-8') as f:
+                details[path.stem] = json.load(f)
+        
+        if not list_pages:
+            raise SystemExit(f"❌ В {directory} нет файлов product_list/*.json")
+        
+        fixtures = cls(list_pages, details)
+        return fixtures.scaled(count)
+    
+    def scaled(self, count):
+        items = [item for page in self.list_pages for item in (page.get('data') or {}).get('list') or []]
+        if not items:
+            return self
+        
+        page_size = len((self.list_pages[0].get('data') or {}).get('list') or []) or 20
+        scaled_items = []
+        details = {}
+        for i in range(count):
+            source = items[i % len(items)]
+            product = dict(source.get('product') or source)
+            source_id = str(product.get('id'))
+            product['id'] = f"{source_id}{i // len(items):04d}" if i >= len(items) else source_id
+            scaled_items.append({'product': product} if 'product' in source else product)
+            if source_id in self.details:
+                details[product['id']] = self.details[source_id]
+        
+        list_pages = [{'code': 100000, 'data': {'list': scaled_items[s:s + page_size]}}
+                      for s in range(0, count, page_size)]
+        if count % page_size == 0:
+            list_pages.append({'code': 100000, 'data': {'list': []}})
+        return Fixtures(list_pages, details)
+
+
+class FakeApiPage:
+    url = 'https://mix.goshare2.com/wv/pc/index/'
+    
+    def __init__(self, fixtures, latency=0.0):
+        self.fixtures = fixtures
+        self.latency = latency
+    
+    async def evaluate(self, script, arg=None):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        
+        if script == LIST_PAGES_SCRIPT:
+            pages = self.fixtures.list_pages
+            return [pages[p['page'] - 1] if 0 < p['page'] <= len(pages) else {'code': 100000, 'data': {'list': []}}
+                    for p in arg['payloads']]
+        
+        if script == DETAIL_BATCH_SCRIPT:
+            results = []
+            for params in arg['items']:
+                data = self.fixtures.details.get(params['id'])
+                results.append({'status': 200 if data else 404, 'data': data})
+            return results
+        
+        return None
+
+
+def create_parser(workdir, translator):
+    config_path = Path(workdir) / 'config.json'
+    with open(config_path, 'w', encoding='utf-8') as f:
+        json.dump(BENCH_CONFIG, f, ensure_ascii=False)
+    
+    zzer = ZzerParser(str(config_path))
+    zzer.rate_limiter = AdaptiveRateLimiter(rate=1e9, max_rate=1e9)
+    zzer._get_translator = lambda: translator
+    return zzer
+
+
+async def run_pipeline(zzer, fixtures, count, latency, timings, memory):
+    task = dict(zzer.config['tasks'][0])
+    zzer.parsing_config['max_products'] = count
+    page = FakeApiPage(fixtures, latency)
+    batch_size = zzer.parsing_config['batch_size']
+    
+    started = time.perf_counter()
+    collector = ProductCollector(task['brand_name'])
+    await zzer.harvest_via_api(page, task, collector, count)
+    timings['harvest'] = time.perf_counter() - started
+    
+    started = time.perf_counter()
+    products = [zzer.extract_product_data(raw, brand_filter=task['brand_name'])
+                for raw in collector.products[:count]]
+    products = [p for p in products if p]
+    collector.products.clear()
+    timings['extract'] = time.perf_counter() - started
+    
+    timings['details'] = 0.0
+    timings['save_batch'] = 0.0
+    saved = 0
+    for start in range(0, len(products), batch_size):
+        batch = products[start:start + batch_size]
+        
+        started = time.perf_counter()
+        await zzer.enrich_products([page], batch)
+        timings['details'] += time.perf_counter() - started
+        
+        saved += len(batch)
+        started = time.perf_counter()
+        zzer.save_batch(batch, task, saved, len(products))
+        timings['save_batch'] += time.perf_counter() - started
+    
+    if tracemalloc.is_tracing():
+        gc.collect()
+        memory['retained'] = tracemalloc.get_traced_memory()[0]
+    
+    started = time.perf_counter()
+    zzer.save_results([], task)
+    timings['save_results'] = time.perf_counter() - started
+    
+    return len(products)
+
+
+def run_size(fixtures, count, args, measure_memory):
+    with tempfile.TemporaryDirectory(prefix='zzer-bench-') as workdir:
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        translator = StubTranslator(args.translate_latency)
+        zzer = create_parser(workdir, translator)
+        timings = {}
+        memory = {}
+        
+        gc.collect()
+        if measure_memory:
+            tracemalloc.start()
+        
+        try:
+            with open(os.devnull, 'w', encoding='utf-8') as devnull:
+                stdout = sys.stdout
+                sys.stdout = devnull
+                try:
+                    processed = asyncio.run(run_pipeline(zzer, fixtures, count, args.latency, timings, memory))
+                finally:
+                    sys.stdout = stdout
+            
+            peak = None
+            if measure_memory:
+                _, peak = tracemalloc.get_traced_memory()
+            
+            output_size = (Path(workdir) / 'products' / 'brand_bench.json').stat().st_size
+        finally:
+            if measure_memory:
+                tracemalloc.stop()
+            zzer.shutdown_translation()
+            zzer.translation_cache.close()
+            os.chdir(cwd)
+    
+    return {
+        'products': processed,
+        'timings': timings,
+        'total_seconds': sum(timings.values()),
+        'peak_memory_bytes': peak,
+        'retained_memory_bytes': memory.get('retained'),
+        'output_bytes': output_size,
+        'translator_calls': translator.calls
+    }
+
+
+def print_result(count, result):
+    total = result['total_seconds']
+    rate = result['products'] / total if total else 0.0
+    stages = ', '.join(f"{name} {seconds:.3f}с" for name, seconds in result['timings'].items())
+    print(f"\n📦 {count} товаров: {total:.3f}с, {rate:.0f} товаров/с")
+    print(f"   Этапы: {stages}")
+    if result['peak_memory_bytes'] is not None:
+        per_product = result['peak_memory_bytes'] / max(1, result['products'])
+        print(f"   Пик памяти: {result['peak_memory_bytes'] / 1024 / 1024:.1f} МБ ({per_product / 1024:.1f} КБ на товар)")
+    if result.get('retained_memory_bytes') is not None:
+        per_product = result['retained_memory_bytes'] / max(1, result['products'])
+        print(f"   Удерживается после обработки: {result['retained_memory_bytes'] / 1024 / 1024:.1f} МБ "
+              f"({per_product:.0f} байт на товар)")
+    print(f"   Итоговый JSON: {result['output_bytes'] / 1024 / 1024:.1f} МБ, запросов перевода: {result['translator_calls']}")
+
+
+def compare_with_baseline(results, baseline_path, tolerance):
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    
+    regressions = []
+    for size, result in results.items():
+        base = baseline.get(size)
+        if not base or not base['total_seconds'] or not result['total_seconds']:
+            continue
+        
+        base_rate = base['products'] / base['total_seconds']
+        rate = result['products'] / result['total_seconds']
+        if rate < base_rate * (1 - tolerance):
+            regressions.append(f"{size} товаров: {rate:.0f}/с против {base_rate:.0f}/с")
+        
+        if base.get('peak_memory_bytes') and result.get('peak_memory_bytes'):
+            if result['peak_memory_bytes'] > base['peak_memory_bytes'] * (1 + tolerance):
+                regressions.append(f"{size} товаров: пик памяти {result['peak_memory_bytes']} против {base['peak_memory_bytes']} байт")
+    
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Офлайн бенчмарк парсера ZZER')
+    parser.add_argument('--sizes', default='10,100,1000,10000,50000', help='Количество товаров через запятую')
+    parser.add_argument('--fixtures', help='Каталог с записанными ответами (product_list/*.json, detail/<id>.json)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Задержка фейкового API на вызов, секунды')
+    parser.add_argument('--translate-latency', type=float, default=0.0, help='Задержка фейкового переводчика, секунды')
+    parser.add_argument('--skip-memory', action='store_true', help='Не измерять пик памяти (tracemalloc)')
+    parser.add_argument('--output', help='Сохранить результаты в JSON')
+    parser.add_argument('--baseline', help='JSON с прошлыми результатами для сравнения')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Допустимое ухудшение относительно baseline (доля)')
+    
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    
+    results = {}
+    for count in sizes:
+        if args.fixtures:
+            fixtures = Fixtures.load(args.fixtures, count)
+        else:
+            fixtures = Fixtures.synthesize(count)
+        
+        result = run_size(fixtures, count, args, measure_memory=False)
+        if not args.skip_memory:
+            memory_result = run_size(fixtures, count, args, measure_memory=True)
+            result['peak_memory_bytes'] = memory_result['peak_memory_bytes']
+            result['retained_memory_bytes'] = memory_result['retained_memory_bytes']
+        
+        results[str(count)] = result
+        print_result(count, result)
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n✓ Результаты: {args.output}")
+    
+    if args.baseline:
+        regressions = compare_with_baseline(results, args.baseline, args.tolerance)
+        if regressions:
+            print("\n❌ Регрессии:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            sys.exit(1)
+        print("\n✅ Регрессий нет")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,101 +4,1591 @@
 import asyncio
 import json
 import time
+import random
 import re
-import shutil
+import os
+import hashlib
+import sys
+import sqlite3
+import threading
+import bisect
+import contextvars
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime
-from playwright.async_api import async_playwright
+from urllib.parse import urlparse
 import argparse
-from deep_translator import GoogleTranslator
+import importlib.util
+
+httpx = None
+
+
+def async_playwright():
+    from playwright.async_api import async_playwright as playwright_factory
+    return playwright_factory()
+
+
+def load_httpx():
+    global httpx
+    if httpx is None and importlib.util.find_spec('httpx') is not None:
+        import httpx as httpx_module
+        httpx = httpx_module
+    return httpx
+
+
+SUCCESS_CODES = [0, '0', 100000, '100000']
+THROTTLE_STATUSES = (429, 502, 503, 504)
+
+
+def intern_text(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+def has_chinese(text):
+    return any('\u4e00' <= char <= '\u9fff' for char in text)
+
+
+GLOSSARY = {
+    '系列': 'Серия',
+    '序列号': 'Серийный номер',
+    '材质': 'Материал',
+    '整体重量': 'Вес',
+    '参考尺码': 'Размер',
+    '尺寸': 'Размеры',
+    '配件': 'Комплект',
+    '商品编码': 'Код товара',
+    '包身长度': 'Длина',
+    '包身高度': 'Высота',
+    '包身厚度': 'Ширина',
+    '颜色': 'Цвет',
+    '成色': 'Состояние',
+    '年份': 'Год',
+    '产地': 'Страна производства',
+    '钥匙': 'Ключ',
+    '小锁': 'Маленький замок',
+    '锁': 'Замок',
+    '肩带': 'Ремешок',
+    '链条': 'Цепочка',
+    '防尘袋': 'Пылезащитный мешок',
+    '盒子': 'Коробка',
+    '说明书': 'Инструкция',
+    '卡片': 'Карточка',
+    '保卡': 'Гарантийная карта',
+    '证书': 'Сертификат',
+    '发票': 'Чек',
+    '吊牌': 'Бирка',
+    '购物袋': 'Фирменный пакет',
+    '全套': 'Полный комплект',
+    '原装': 'Оригинал',
+    '无配件': 'Без комплекта',
+    '无': 'Нет',
+    '牛皮': 'Воловья кожа',
+    '小牛皮': 'Телячья кожа',
+    '羊皮': 'Овечья кожа',
+    '小羊皮': 'Кожа ягненка',
+    '漆皮': 'Лакированная кожа',
+    '鳄鱼皮': 'Крокодиловая кожа',
+    '真皮': 'Натуральная кожа',
+    '皮革': 'Кожа',
+    '帆布': 'Канва',
+    '尼龙': 'Нейлон',
+    '丝绸': 'Шелк',
+    '羊毛': 'Шерсть',
+    '金属': 'Металл',
+    '五金': 'Фурнитура',
+    '黑色': 'Черный',
+    '白色': 'Белый',
+    '红色': 'Красный',
+    '酒红色': 'Бордовый',
+    '蓝色': 'Синий',
+    '绿色': 'Зеленый',
+    '黄色': 'Желтый',
+    '粉色': 'Розовый',
+    '紫色': 'Фиолетовый',
+    '灰色': 'Серый',
+    '棕色': 'Коричневый',
+    '米色': 'Бежевый',
+    '金色': 'Золотой',
+    '银色': 'Серебряный',
+    '厘米': 'см',
+    '克': 'г'
+}
+
+GLOSSARY_PUNCTUATION = str.maketrans({'、': ', ', '，': ', ', '；': '; ', '：': ': ', '（': ' (', '）': ')', '＋': '+'})
+
+
+class Glossary:
+    def __init__(self, phrases=None):
+        self.phrases = {}
+        self.hits = 0
+        self._lock = threading.Lock()
+        self._automaton = None
+        if phrases:
+            self.update(phrases)
+    
+    def __len__(self):
+        return len(self.phrases)
+    
+    def update(self, phrases):
+        with self._lock:
+            for source, translated in phrases.items():
+                if source and translated and not has_chinese(translated):
+                    self.phrases[source] = translated.strip()
+            self._automaton = None
+    
+    def learn(self, pairs, max_chars):
+        learned = {source: translated for source, translated in pairs
+                   if len(source) <= max_chars and source not in self.phrases
+                   and all('\u4e00' <= char <= '\u9fff' for char in source)}
+        if learned:
+            self.update(learned)
+    
+    def _build(self):
+        goto = [{}]
+        fail = [0]
+        lengths = [()]
+        
+        for phrase in self.phrases:
+            node = 0
+            for char in phrase:
+                child = goto[node].get(char)
+                if child is None:
+                    child = len(goto)
+                    goto[node][char] = child
+                    goto.append({})
+                    fail.append(0)
+                    lengths.append(())
+                node = child
+            lengths[node] = (len(phrase),)
+        
+        order = list(goto[0].values())
+        for node in order:
+            for char, child in goto[node].items():
+                state = fail[node]
+                while state and char not in goto[state]:
+                    state = fail[state]
+                fail[child] = goto[state].get(char, 0)
+                lengths[child] = lengths[child] + lengths[fail[child]]
+                order.append(child)
+        
+        return goto, fail, lengths
+    
+    def segment(self, text):
+        with self._lock:
+            if self._automaton is None:
+                self._automaton = self._build()
+            goto, fail, lengths = self._automaton
+            phrases = self.phrases
+        
+        size = len(text)
+        starts = [[] for _ in range(size)]
+        node = 0
+        for end, char in enumerate(text, 1):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for length in lengths[node]:
+                starts[end - length].append(length)
+        
+        cost = [0] * (size + 1)
+        step = [0] * (size + 1)
+        for i in range(size - 1, -1, -1):
+            best = float('inf')
+            if not has_chinese(text[i]):
+                best = cost[i + 1]
+            for length in sorted(starts[i], reverse=True):
+                if cost[i + length] + 1 < best:
+                    best = cost[i + length] + 1
+                    step[i] = length
+            cost[i] = best
+        
+        if cost[0] == float('inf'):
+            return None
+        
+        segments = []
+        i = 0
+        while i < size:
+            length = step[i]
+            if length:
+                segments.append((text[i:i + length], phrases[text[i:i + length]]))
+                i += length
+            else:
+                if segments and segments[-1][1] is None:
+                    segments[-1] = (segments[-1][0] + text[i], None)
+                else:
+                    segments.append((text[i], None))
+                i += 1
+        return segments
+    
+    def translate(self, text):
+        segments = self.segment(text)
+        if segments is None:
+            return None
+        
+        result = ''
+        for source, translated in segments:
+            piece = source.translate(GLOSSARY_PUNCTUATION) if translated is None else translated
+            if result and result[-1].isalnum() and piece[:1].isalnum():
+                result += ' '
+            result += piece
+        
+        return ' '.join(result.split())
+
+
+BLOCKED_DOMAINS = [
+    'google-analytics.com',
+    'googletagmanager.com',
+    'doubleclick.net',
+    'hm.baidu.com',
+    'cnzz.com',
+    'umeng.com',
+    'growingio.com',
+    'sensorsdata.cn',
+    'sentry.io'
+]
+
+
+DETAIL_BATCH_SCRIPT = """
+    async ({url, items}) => {
+        const results = await Promise.allSettled(items.map(async (params) => {
+            const response = await fetch(url + '?' + new URLSearchParams(params).toString(), {
+                method: 'GET',
+                headers: {
+                    'Accept': 'application/json'
+                }
+            });
+            
+            if (response.ok) {
+                return {status: response.status, data: await response.json()};
+            }
+            return {status: response.status, data: null};
+        }));
+        return results.map(r => r.status === 'fulfilled' ? r.value : {status: 0, data: null});
+    }
+"""
+
+
+LIST_PAGES_SCRIPT = """
+    async ({url, params, payloads}) => {
+        const query = new URLSearchParams(params).toString();
+        const results = await Promise.allSettled(payloads.map(async (payload) => {
+            const response = await fetch(url + '?' + query, {
+                method: 'POST',
+                headers: {
+                    'Accept': 'application/json',
+                    'Content-Type': 'application/json'
+                },
+                body: JSON.stringify(payload)
+            });
+            
+            if (response.ok) {
+                return await response.json();
+            }
+            return null;
+        }));
+        return results.map(r => r.status === 'fulfilled' ? r.value : null);
+    }
+"""
+
+
+class ProductRecord:
+    __slots__ = ('id', 'sku', 'name', 'name_ru', 'description', 'price', 'price_rub', 'price_discount',
+                 'price_rub_discount', 'currency', 'brand', 'size', 'condition', 'main_image', 'city',
+                 'extra_images', 'local_images', 'details', '_article')
+    
+    def __init__(self, id, sku='', name='', name_ru='', description='', price='', price_rub='', price_discount='',
+                 price_rub_discount='', currency='CNY', brand='', size='', condition='', main_image='', city='',
+                 extra_images=(), local_images=None, details=None, article=None):
+        self.id = id
+        self.sku = sku
+        self.name = name
+        self.name_ru = name_ru
+        self.description = intern_text(description)
+        self.price = price
+        self.price_rub = price_rub
+        self.price_discount = price_discount
+        self.price_rub_discount = price_rub_discount
+        self.currency = intern_text(currency)
+        self.brand = intern_text(brand)
+        self.size = intern_text(size)
+        self.condition = intern_text(condition)
+        self.main_image = main_image or ''
+        self.city = intern_text(city)
+        self.extra_images = tuple(extra_images)
+        self.local_images = local_images
+        self.details = details or {}
+        self.article = article
+    
+    @property
+    def article(self):
+        if self._article is not None:
+            return self._article
+        return f"{self.sku}{self.city}" if self.city else self.sku
+    
+    @article.setter
+    def article(self, value):
+        self._article = None
+        if value is not None and value != self.article:
+            self._article = value
+    
+    @property
+    def all_images(self):
+        if self.main_image:
+            return [self.main_image, *self.extra_images]
+        return list(self.extra_images)
+    
+    @all_images.setter
+    def all_images(self, images):
+        self.extra_images = tuple(img for img in images if img != self.main_image)
+    
+    def set_details(self, details):
+        self.details = {intern_text(key): intern_text(value) for key, value in details.items()}
+    
+    def to_dict(self):
+        data = {
+            'id': self.id,
+            'sku': self.sku,
+            'article': self.article,
+            'name': self.name,
+            'name_ru': self.name_ru,
+            'description': self.description,
+            'price': self.price,
+            'price_rub': self.price_rub,
+            'price_discount': self.price_discount,
+            'price_rub_discount': self.price_rub_discount,
+            'currency': self.currency,
+            'brand': self.brand,
+            'size': self.size,
+            'condition': self.condition,
+            'main_image': self.main_image,
+            'city': self.city,
+            'all_images': self.all_images
+        }
+        if self.local_images is not None:
+            data['local_images'] = self.local_images
+        data['details'] = self.details
+        return data
+    
+    @classmethod
+    def from_dict(cls, data):
+        record = cls(
+            str(data.get('id', '')),
+            sku=data.get('sku', ''),
+            name=data.get('name', ''),
+            name_ru=data.get('name_ru', ''),
+            description=data.get('description', ''),
+            price=data.get('price', ''),
+            price_rub=data.get('price_rub', ''),
+            price_discount=data.get('price_discount', ''),
+            price_rub_discount=data.get('price_rub_discount', ''),
+            currency=data.get('currency', 'CNY'),
+            brand=data.get('brand', ''),
+            size=data.get('size', ''),
+            condition=data.get('condition', ''),
+            main_image=data.get('main_image', ''),
+            city=data.get('city', ''),
+            local_images=data.get('local_images')
+        )
+        record.all_images = data.get('all_images') or []
+        record.set_details(data.get('details') or {})
+        record.article = data.get('article')
+        return record
+
+
+class ProductCollector:
+    def __init__(self, brand_name, limit=None):
+        self.brand_name = brand_name.lower()
+        self.limit = limit
+        self.products = []
+        self.ids = set()
+        self.responses = 0
+        self.complete = False
+        self._waiters = []
+    
+    def __len__(self):
+        return len(self.products)
+    
+    def notify_response(self):
+        self.responses += 1
+        waiters, self._waiters = self._waiters, []
+        for future in waiters:
+            if not future.done():
+                future.set_result(self.responses)
+    
+    async def wait_for_response(self, since, timeout):
+        if self.responses > since:
+            return True
+        
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            await asyncio.wait_for(future, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            if future in self._waiters:
+                self._waiters.remove(future)
+    
+    def add_items(self, items):
+        added = 0
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            product = item.get('product') or item
+            if product.get('id'):
+                brand = product.get('brandName', '').lower()
+                if self.brand_name in brand:
+                    pid = product['id']
+                    if self.limit is not None and len(self.products) >= self.limit:
+                        break
+                    if pid not in self.ids:
+                        self.ids.add(pid)
+                        self.products.append(product)
+                        added += 1
+        return added
+    
+    def add_response(self, data):
+        code = str(data.get('code', ''))
+        if code == '100000' and data.get('data') and data['data'].get('list'):
+            return self.add_items(data['data']['list'])
+        return 0
+
+
+class BrandRouter(ProductCollector):
+    def __init__(self, collectors, limit, patience=None):
+        super().__init__('', limit)
+        self.collectors = collectors
+        self.patience = patience
+        self.seen = 0
+        self.last_match = [0] * len(collectors)
+    
+    def __len__(self):
+        waiting = [len(collector) for i, collector in enumerate(self.collectors)
+                   if not self.is_full(i) and not self.is_exhausted(i)]
+        return min(waiting) if waiting else self.limit
+    
+    def is_full(self, i):
+        return len(self.collectors[i]) >= self.limit
+    
+    def is_exhausted(self, i):
+        return self.patience is not None and self.seen - self.last_match[i] >= self.patience
+    
+    def add_items(self, items):
+        items = [item for item in items if isinstance(item, dict)]
+        self.seen += len(items)
+        added = 0
+        for i, collector in enumerate(self.collectors):
+            if self.is_full(i):
+                continue
+            count = collector.add_items(items)
+            if count:
+                self.last_match[i] = self.seen
+            added += count
+        return added
+
+
+class AdaptiveTimeout:
+    def __init__(self, initial=3.0, minimum=0.5, maximum=10.0, factor=3.0):
+        self.value = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.factor = factor
+        self.average = None
+    
+    def observe(self, elapsed):
+        self.average = elapsed if self.average is None else 0.8 * self.average + 0.2 * elapsed
+        self.value = min(self.maximum, max(self.minimum, self.average * self.factor))
+    
+    def expired(self):
+        self.value = min(self.maximum, self.value * 1.5)
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_current_metrics = contextvars.ContextVar('zzer_metrics', default=None)
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+    
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+    
+    def merge(self, other):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+    
+    def quantile(self, q):
+        if not self.count:
+            return 0.0
+        
+        rank = q * self.count
+        cumulative = 0
+        for i, bucket_count in enumerate(self.counts):
+            if bucket_count and cumulative + bucket_count >= rank:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                value = lower + (upper - lower) * (rank - cumulative) / bucket_count
+                return min(value, self.max)
+            cumulative += bucket_count
+        return self.max
+
+
+class Metrics:
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self.started_at = datetime.now().isoformat()
+        self.started = time.perf_counter()
+    
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+    
+    @staticmethod
+    def _format_key(name, labels, prefix=''):
+        if not labels:
+            return f"{prefix}{name}"
+        return f"{prefix}{name}{{" + ','.join(f'{k}="{v}"' for k, v in labels) + "}"
+    
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        self.counters[key] = self.counters.get(key, 0) + value
+    
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.observe(value)
+    
+    def merge(self, other, **labels):
+        for (name, key_labels), value in other.counters.items():
+            key = self._key(name, dict(key_labels, **labels))
+            self.counters[key] = self.counters.get(key, 0) + value
+        for (name, key_labels), source in other.histograms.items():
+            key = self._key(name, dict(key_labels, **labels))
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(source.buckets)
+            histogram.merge(source)
+    
+    def counter(self, name, **labels):
+        return self.counters.get(self._key(name, labels), 0)
+    
+    def to_dict(self):
+        return {
+            'counters': [[name, labels, value] for (name, labels), value in self.counters.items()],
+            'histograms': [[name, labels, h.counts, h.count, h.sum, h.max]
+                           for (name, labels), h in self.histograms.items()]
+        }
+    
+    @classmethod
+    def from_dict(cls, data):
+        metrics = cls()
+        for name, labels, value in data.get('counters', []):
+            metrics.counters[cls._key(name, dict(labels))] = value
+        for name, labels, counts, count, total, maximum in data.get('histograms', []):
+            histogram = metrics.histograms[cls._key(name, dict(labels))] = Histogram()
+            histogram.counts = counts
+            histogram.count = count
+            histogram.sum = total
+            histogram.max = maximum
+        return metrics
+    
+    def summary(self, task):
+        duration = time.perf_counter() - self.started
+        processed = self.counter('products_processed_total')
+        hits = self.counter('translation_lookups_total', result='hit')
+        misses = self.counter('translation_lookups_total', result='miss')
+        
+        return {
+            'task': task.get('name', ''),
+            'brand_id': task.get('payload', {}).get('brandId', 'unknown'),
+            'started_at': self.started_at,
+            'duration_seconds': round(duration, 3),
+            'products_per_second': round(processed / duration, 3) if duration else 0.0,
+            'translation_cache_hit_ratio': round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            'counters': {self._format_key(name, labels): value for (name, labels), value in self.counters.items()},
+            'histograms': {
+                self._format_key(name, labels): {
+                    'count': h.count,
+                    'sum': round(h.sum, 6),
+                    'max': round(h.max, 6),
+                    'p50': round(h.quantile(0.5), 6),
+                    'p95': round(h.quantile(0.95), 6),
+                    'p99': round(h.quantile(0.99), 6)
+                }
+                for (name, labels), h in self.histograms.items()
+            }
+        }
+    
+    def to_prometheus(self, task):
+        summary = self.summary(task)
+        base = (('brand_id', summary['brand_id']),)
+        lines = []
+        
+        for gauge in ('duration_seconds', 'products_per_second', 'translation_cache_hit_ratio'):
+            lines.append(f"# TYPE zzer_{gauge} gauge")
+            lines.append(f"{self._format_key(gauge, base, 'zzer_')} {summary[gauge]}")
+        
+        typed = set()
+        for (name, labels), value in sorted(self.counters.items()):
+            if name not in typed:
+                lines.append(f"# TYPE zzer_{name} counter")
+                typed.add(name)
+            lines.append(f"{self._format_key(name, base + labels, 'zzer_')} {value}")
+        
+        for (name, labels), h in sorted(self.histograms.items(), key=lambda item: item[0]):
+            if name not in typed:
+                lines.append(f"# TYPE zzer_{name} histogram")
+                typed.add(name)
+            cumulative = 0
+            for bound, bucket_count in zip(list(h.buckets) + ['+Inf'], h.counts):
+                cumulative += bucket_count
+                lines.append(f"{self._format_key(name + '_bucket', base + labels + (('le', bound),), 'zzer_')} {cumulative}")
+            lines.append(f"{self._format_key(name + '_sum', base + labels, 'zzer_')} {h.sum:.6f}")
+            lines.append(f"{self._format_key(name + '_count', base + labels, 'zzer_')} {h.count}")
+        
+        return '\n'.join(lines) + '\n'
+    
+    def export(self, directory, task):
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        brand_id = task.get('payload', {}).get('brandId', 'unknown')
+        
+        json_path = directory / f'brand_{brand_id}.json'
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(task), f, ensure_ascii=False, indent=2)
+        with open(directory / f'brand_{brand_id}.prom', 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus(task))
+        return json_path
+
+
+def metric_inc(name, value=1, **labels):
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.inc(name, value, **labels)
+
+
+def metric_observe(name, value, **labels):
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.observe(name, value, **labels)
+
+
+@contextmanager
+def metric_timer(name, **labels):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metric_observe(name, time.perf_counter() - started, **labels)
+
+
+class PhaseTimer:
+    def __init__(self):
+        self.timings = OrderedDict()
+    
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed
+            metric_observe('phase_seconds', elapsed, phase=name)
+    
+    def report(self):
+        if self.timings:
+            parts = ', '.join(f"{name} {elapsed:.2f}с" for name, elapsed in self.timings.items())
+            print(f"⏱ Тайминги: {parts}")
+
+
+class TrafficStats:
+    def __init__(self):
+        self.requests = 0
+        self.bytes = 0
+        self.blocked = 0
+        self.started = time.perf_counter()
+    
+    async def on_request_finished(self, request):
+        self.requests += 1
+        metric_inc('network_requests_total')
+        try:
+            sizes = await request.sizes()
+            size = max(0, sizes.get('responseBodySize', 0)) + max(0, sizes.get('responseHeadersSize', 0))
+            self.bytes += size
+            metric_inc('network_bytes_total', size)
+        except Exception as e:
+            pass
+    
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        print(f"📶 Трафик: {self.requests} запросов, {self.bytes / 1024 / 1024:.2f} МБ, "
+              f"заблокировано {self.blocked}, время задачи {elapsed:.1f}с")
+
+
+class DetailHttpClient:
+    def __init__(self, api_url, headers, cookies, max_connections=20, timeout=15.0, fallback_after=5,
+                 throttle_codes=()):
+        self.api_url = api_url
+        self.fallback_after = fallback_after
+        self.throttle_codes = [str(code) for code in throttle_codes]
+        self.disabled = False
+        self.rejected = 0
+        self._consecutive_rejections = 0
+        self.http2 = importlib.util.find_spec('h2') is not None
+        
+        jar = httpx.Cookies()
+        for cookie in cookies:
+            jar.set(cookie['name'], cookie['value'], domain=cookie.get('domain', ''), path=cookie.get('path', '/'))
+        
+        self.client = httpx.AsyncClient(
+            headers=headers,
+            cookies=jar,
+            http2=self.http2,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        )
+    
+    def _reject(self, status):
+        self.rejected += 1
+        self._consecutive_rejections += 1
+        if self._consecutive_rejections >= self.fallback_after and not self.disabled:
+            self.disabled = True
+            print("⚠️ API отклоняет прямые запросы, возвращаемся к запросам из браузера")
+        return status, None
+    
+    async def fetch_with_status(self, params):
+        if self.disabled:
+            return 0, None
+        
+        try:
+            with metric_timer('detail_http_seconds'):
+                response = await self.client.get(self.api_url, params=params)
+        except httpx.HTTPError as e:
+            return self._reject(0)
+        
+        if response.status_code in THROTTLE_STATUSES:
+            return response.status_code, None
+        
+        try:
+            data = response.json()
+        except ValueError:
+            return self._reject(response.status_code)
+        
+        if not isinstance(data, dict):
+            return self._reject(response.status_code)
+        
+        if response.status_code == 200 and data.get('code') in SUCCESS_CODES:
+            self._consecutive_rejections = 0
+        elif str(data.get('code')) not in self.throttle_codes:
+            self._reject(response.status_code)
+        return response.status_code, data
+    
+    async def fetch_many(self, params_list):
+        return list(await asyncio.gather(*(self.fetch_with_status(params) for params in params_list)))
+    
+    async def close(self):
+        await self.client.aclose()
+
+
+class ImageMirror:
+    IMAGE_SUFFIXES = {'image/jpeg': '.jpg', 'image/png': '.png', 'image/webp': '.webp', 'image/gif': '.gif'}
+    
+    def __init__(self, directory, max_connections=16, timeout=30.0, retries=2, revalidate=False):
+        self.directory = Path(directory)
+        self.retries = retries
+        self.revalidate = revalidate
+        self.downloaded = 0
+        self.not_modified = 0
+        self.reused = 0
+        self.failed = 0
+        self.bytes = 0
+        self._inflight = {}
+        self._semaphore = asyncio.Semaphore(max_connections)
+        
+        (self.directory / 'partial').mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.directory / 'index.sqlite'), timeout=30)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS images ('
+            'url TEXT PRIMARY KEY, sha256 TEXT, path TEXT, etag TEXT, last_modified TEXT, size INTEGER, '
+            'checked_at REAL NOT NULL)'
+        )
+        self._conn.commit()
+        
+        self.client = httpx.AsyncClient(
+            http2=importlib.util.find_spec('h2') is not None,
+            timeout=timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        )
+    
+    def _lookup(self, url):
+        return self._conn.execute(
+            'SELECT sha256, path, etag, last_modified FROM images WHERE url = ?', (url,)
+        ).fetchone()
+    
+    def _save(self, url, sha256, path, etag, last_modified, size):
+        self._conn.execute(
+            'INSERT OR REPLACE INTO images (url, sha256, path, etag, last_modified, size, checked_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (url, sha256, path, etag, last_modified, size, time.time())
+        )
+        self._conn.commit()
+    
+    def _content_path(self, sha256, url, content_type):
+        suffix = Path(urlparse(url).path).suffix.lower()
+        if suffix not in ('.jpg', '.jpeg', '.png', '.webp', '.gif'):
+            suffix = self.IMAGE_SUFFIXES.get(content_type.split(';')[0].strip().lower(), '')
+        return self.directory / sha256[:2] / f'{sha256}{suffix}'
+    
+    async def mirror(self, url):
+        future = self._inflight.get(url)
+        if future is None:
+            future = asyncio.ensure_future(self._mirror(url))
+            self._inflight[url] = future
+            future.add_done_callback(lambda _: self._inflight.pop(url, None))
+        return await future
+    
+    async def _mirror(self, url):
+        row = self._lookup(url)
+        stored = row[1] if row and row[0] and Path(row[1]).exists() else None
+        if stored and not self.revalidate:
+            self.reused += 1
+            metric_inc('images_total', result='reused')
+            return stored
+        
+        for attempt in range(self.retries + 1):
+            try:
+                async with self._semaphore:
+                    with metric_timer('image_download_seconds'):
+                        return await self._download(url, self._lookup(url), stored)
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code < 500:
+                    break
+            except (httpx.HTTPError, OSError) as e:
+                pass
+            if attempt < self.retries:
+                await asyncio.sleep(0.5 * 2 ** attempt)
+        
+        self.failed += 1
+        metric_inc('images_total', result='failed')
+        return stored
+    
+    async def _download(self, url, row, stored):
+        part_path = self.directory / 'partial' / f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.part"
+        headers = {}
+        offset = 0
+        
+        if stored:
+            if row[2]:
+                headers['If-None-Match'] = row[2]
+            if row[3]:
+                headers['If-Modified-Since'] = row[3]
+        elif row and (row[2] or row[3]) and part_path.exists():
+            offset = part_path.stat().st_size
+            if offset:
+                headers['Range'] = f'bytes={offset}-'
+                headers['If-Range'] = row[2] or row[3]
+        
+        async with self.client.stream('GET', url, headers=headers) as response:
+            if response.status_code == 304 and stored:
+                self._save(url, row[0], stored, row[2], row[3], Path(stored).stat().st_size)
+                self.not_modified += 1
+                metric_inc('images_total', result='not_modified')
+                return stored
+            response.raise_for_status()
+            
+            etag = response.headers.get('etag')
+            last_modified = response.headers.get('last-modified')
+            content_type = response.headers.get('content-type', '')
+            if response.status_code != 206:
+                offset = 0
+            
+            digest = hashlib.sha256()
+            if offset:
+                with open(part_path, 'rb') as f:
+                    for block in iter(lambda: f.read(65536), b''):
+                        digest.update(block)
+            elif not (row and row[0]):
+                self._save(url, None, None, etag, last_modified, None)
+            
+            with open(part_path, 'ab' if offset else 'wb') as f:
+                async for block in response.aiter_bytes():
+                    f.write(block)
+                    digest.update(block)
+            received = part_path.stat().st_size - offset
+        
+        sha256 = digest.hexdigest()
+        path = self._content_path(sha256, url, content_type)
+        if path.exists():
+            part_path.unlink()
+        else:
+            path.parent.mkdir(exist_ok=True)
+            os.replace(part_path, path)
+        
+        self._save(url, sha256, str(path), etag or (row[2] if row else None),
+                   last_modified or (row[3] if row else None), path.stat().st_size)
+        self.downloaded += 1
+        self.bytes += received
+        metric_inc('images_total', result='downloaded')
+        metric_inc('image_bytes_total', received)
+        return str(path)
+    
+    async def mirror_products(self, products):
+        urls = list(dict.fromkeys(url for product in products for url in product.all_images))
+        paths = dict(zip(urls, await asyncio.gather(*(self.mirror(url) for url in urls))))
+        for product in products:
+            product.local_images = [paths.get(url) for url in product.all_images]
+    
+    def report(self):
+        print(f"🖼 Изображения: скачано {self.downloaded} ({self.bytes / 1024 / 1024:.2f} МБ), "
+              f"не изменились {self.not_modified}, из локального хранилища {self.reused}, ошибок {self.failed}")
+    
+    async def close(self):
+        await self.client.aclose()
+        self._conn.close()
+
+
+class AdaptiveRateLimiter:
+    def __init__(self, rate=5.0, min_rate=0.5, max_rate=50.0, increase=0.1, decrease=0.5, cooldown=1.0):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self.last_decrease = 0.0
+        self.throttled = 0
+        self._lock = asyncio.Lock()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(max(1.0, self.rate), self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    async def acquire(self, count=1):
+        async with self._lock:
+            for _ in range(count):
+                self._refill()
+                if self.tokens < 1:
+                    await asyncio.sleep((1 - self.tokens) / self.rate)
+                    self._refill()
+                self.tokens -= 1
+    
+    def on_success(self):
+        self.rate = min(self.max_rate, self.rate + self.increase)
+    
+    def on_throttle(self):
+        self.throttled += 1
+        now = time.monotonic()
+        if now - self.last_decrease >= self.cooldown:
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self.tokens = min(self.tokens, 0.0)
+            self.last_decrease = now
+
+
+class TranslationCache:
+    def __init__(self, path, max_size=5000, ttl_days=None):
+        self.path = Path(path)
+        self.max_size = max(1, max_size)
+        self.ttl = ttl_days * 86400 if ttl_days else None
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+    
+    def _connect(self):
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), timeout=30)
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS translations ('
+                'source TEXT PRIMARY KEY, translated TEXT NOT NULL, created_at REAL NOT NULL)'
+            )
+            if self.ttl:
+                self._conn.execute('DELETE FROM translations WHERE created_at < ?',
+                                   (time.time() - self.ttl,))
+            self._conn.commit()
+        return self._conn
+    
+    def _remember(self, text, translated):
+        self.memory[text] = translated
+        self.memory.move_to_end(text)
+        while len(self.memory) > self.max_size:
+            self.memory.popitem(last=False)
+    
+    def get(self, text):
+        if text in self.memory:
+            self.memory.move_to_end(text)
+            self.hits += 1
+            return self.memory[text]
+        
+        row = self._connect().execute(
+            'SELECT translated, created_at FROM translations WHERE source = ?', (text,)
+        ).fetchone()
+        
+        if row and not (self.ttl and row[1] < time.time() - self.ttl):
+            self._remember(text, row[0])
+            self.hits += 1
+            return row[0]
+        
+        self.misses += 1
+        return None
+    
+    def set_many(self, translations):
+        if not translations:
+            return
+        now = time.time()
+        conn = self._connect()
+        conn.executemany(
+            'INSERT OR REPLACE INTO translations (source, translated, created_at) VALUES (?, ?, ?)',
+            [(text, translated, now) for text, translated in translations.items()]
+        )
+        conn.commit()
+        for text, translated in translations.items():
+            self._remember(text, translated)
+    
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+    
+    def iter_entries(self, max_chars):
+        query = 'SELECT source, translated FROM translations WHERE length(source) <= ?'
+        params = [max_chars]
+        if self.ttl:
+            query += ' AND created_at >= ?'
+            params.append(time.time() - self.ttl)
+        return self._connect().execute(query, params)
+    
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class ShardQueue:
+    def __init__(self, path, lease_seconds=300):
+        self.path = Path(path)
+        self.lease_seconds = lease_seconds
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS items ('
+            'id TEXT PRIMARY KEY, position INTEGER NOT NULL, raw TEXT NOT NULL, '
+            "status TEXT NOT NULL DEFAULT 'pending', worker TEXT, lease_until REAL, result TEXT)"
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS items_status ON items (status, position)')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS worker_stats (worker TEXT PRIMARY KEY, stats TEXT NOT NULL)')
+    
+    @contextmanager
+    def _transaction(self):
+        self._conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield self._conn
+        except BaseException:
+            self._conn.execute('ROLLBACK')
+            raise
+        self._conn.execute('COMMIT')
+    
+    def add(self, items):
+        with self._transaction() as conn:
+            start = conn.execute('SELECT COALESCE(MAX(position), -1) + 1 FROM items').fetchone()[0]
+            conn.executemany(
+                'INSERT OR IGNORE INTO items (id, position, raw) VALUES (?, ?, ?)',
+                ((item_id, start + i, json.dumps(raw, ensure_ascii=False)) for i, (item_id, raw) in enumerate(items))
+            )
+    
+    def lease(self, worker, count):
+        now = time.time()
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT id, raw FROM items WHERE status = 'pending' OR (status = 'leased' AND lease_until < ?) "
+                'ORDER BY position LIMIT ?', (now, count)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE items SET status = 'leased', worker = ?, lease_until = ? WHERE id = ?",
+                [(worker, now + self.lease_seconds, item_id) for item_id, _ in rows]
+            )
+        return [(item_id, json.loads(raw)) for item_id, raw in rows]
+    
+    def complete(self, results, worker=None, stats=None):
+        with self._transaction() as conn:
+            conn.executemany(
+                "UPDATE items SET status = 'done', worker = NULL, lease_until = NULL, raw = '', result = ? WHERE id = ?",
+                [(json.dumps(product, ensure_ascii=False) if product else None, item_id)
+                 for item_id, product in results]
+            )
+            if stats is not None:
+                conn.execute('INSERT OR REPLACE INTO worker_stats (worker, stats) VALUES (?, ?)',
+                             (worker, json.dumps(stats)))
+    
+    def take_worker_stats(self):
+        with self._transaction() as conn:
+            rows = conn.execute('SELECT stats FROM worker_stats').fetchall()
+            conn.execute('DELETE FROM worker_stats')
+        return [json.loads(stats) for (stats,) in rows]
+    
+    def release(self, worker):
+        with self._transaction() as conn:
+            return conn.execute(
+                "UPDATE items SET status = 'pending', worker = NULL, lease_until = NULL "
+                "WHERE status = 'leased' AND worker = ?", (worker,)
+            ).rowcount
+    
+    def counts(self):
+        counts = {'pending': 0, 'leased': 0, 'done': 0}
+        counts.update(self._conn.execute('SELECT status, COUNT(*) FROM items GROUP BY status').fetchall())
+        return counts
+    
+    def iter_results(self):
+        cursor = self._conn.execute(
+            "SELECT result FROM items WHERE status = 'done' AND result IS NOT NULL ORDER BY position"
+        )
+        for (result,) in cursor:
+            yield json.loads(result)
+    
+    def close(self):
+        self._conn.close()
+    
+    def remove(self):
+        for suffix in ('', '-wal', '-shm'):
+            path = self.path.with_name(self.path.name + suffix)
+            if path.exists():
+                path.unlink()
+
+
+class ProductIndex:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS products (
+                id TEXT PRIMARY KEY, brand_id TEXT, sku TEXT, article TEXT, brand TEXT, name TEXT, name_ru TEXT,
+                price REAL, price_discount REAL, price_rub REAL, price_rub_discount REAL, condition TEXT,
+                size TEXT, city TEXT, serial TEXT, first_seen TEXT NOT NULL, updated_at TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS price_history (
+                id TEXT NOT NULL, updated_at TEXT NOT NULL, price REAL, price_discount REAL,
+                PRIMARY KEY (id, updated_at)
+            );
+            CREATE INDEX IF NOT EXISTS products_brand_id ON products (brand_id);
+            CREATE INDEX IF NOT EXISTS products_brand ON products (brand COLLATE NOCASE);
+            CREATE INDEX IF NOT EXISTS products_sku ON products (sku);
+            CREATE INDEX IF NOT EXISTS products_article ON products (article);
+            CREATE INDEX IF NOT EXISTS products_serial ON products (serial);
+            CREATE INDEX IF NOT EXISTS products_city ON products (city);
+            CREATE INDEX IF NOT EXISTS products_updated_at ON products (updated_at);
+        ''')
+    
+    @staticmethod
+    def _number(value):
+        try:
+            return float(value) if value not in ('', None) else None
+        except (TypeError, ValueError):
+            return None
+    
+    def add(self, product, brand_id, updated_at):
+        product_id = str(product.get('id', ''))
+        price = self._number(product.get('price'))
+        price_discount = self._number(product.get('price_discount'))
+        
+        previous = self._conn.execute(
+            'SELECT price, price_discount FROM products WHERE id = ?', (product_id,)
+        ).fetchone()
+        
+        self._conn.execute(
+            'INSERT INTO products (id, brand_id, sku, article, brand, name, name_ru, price, price_discount, '
+            'price_rub, price_rub_discount, condition, size, city, serial, first_seen, updated_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) '
+            'ON CONFLICT(id) DO UPDATE SET brand_id = excluded.brand_id, sku = excluded.sku, '
+            'article = excluded.article, brand = excluded.brand, name = excluded.name, name_ru = excluded.name_ru, '
+            'price = excluded.price, price_discount = excluded.price_discount, price_rub = excluded.price_rub, '
+            'price_rub_discount = excluded.price_rub_discount, condition = excluded.condition, '
+            'size = excluded.size, city = excluded.city, serial = excluded.serial, updated_at = excluded.updated_at',
+            (
+                product_id, str(brand_id), product.get('sku', ''), product.get('article', ''),
+                product.get('brand', ''), product.get('name', ''), product.get('name_ru', ''),
+                price, price_discount, self._number(product.get('price_rub')),
+                self._number(product.get('price_rub_discount')), product.get('condition', ''),
+                product.get('size', ''), product.get('city', ''),
+                (product.get('details') or {}).get('Серийный номер'), updated_at, updated_at
+            )
+        )
+        
+        if previous is None or (previous['price'], previous['price_discount']) != (price, price_discount):
+            self._conn.execute(
+                'INSERT OR REPLACE INTO price_history (id, updated_at, price, price_discount) VALUES (?, ?, ?, ?)',
+                (product_id, updated_at, price, price_discount)
+            )
+    
+    def find(self, product_id=None, sku=None, serial=None, city=None, brand=None, brand_id=None,
+             price_changed=False, limit=50):
+        clauses = []
+        params = []
+        if product_id:
+            clauses.append('p.id = ?')
+            params.append(str(product_id))
+        if sku:
+            clauses.append('(p.sku = ? OR p.article = ?)')
+            params.extend([sku, sku])
+        if serial:
+            clauses.append('p.serial = ?')
+            params.append(serial)
+        if city:
+            clauses.append('p.city = ?')
+            params.append(city.upper())
+        if brand:
+            clauses.append('p.brand = ? COLLATE NOCASE')
+            params.append(brand)
+        if brand_id:
+            clauses.append('p.brand_id = ?')
+            params.append(str(brand_id))
+        if price_changed:
+            clauses.append('(SELECT COUNT(*) FROM price_history h WHERE h.id = p.id) > 1')
+        
+        query = 'SELECT p.* FROM products p'
+        if clauses:
+            query += ' WHERE ' + ' AND '.join(clauses)
+        query += ' ORDER BY p.updated_at DESC, p.id LIMIT ?'
+        params.append(limit)
+        return self._conn.execute(query, params).fetchall()
+    
+    def price_history(self, product_id):
+        return self._conn.execute(
+            'SELECT updated_at, price, price_discount FROM price_history WHERE id = ? ORDER BY updated_at',
+            (str(product_id),)
+        ).fetchall()
+    
+    def commit(self):
+        self._conn.commit()
+    
+    def rollback(self):
+        self._conn.rollback()
+    
+    def close(self):
+        self._conn.close()
 
 
 class ZzerParser:
+    LISTING_FIELDS = ('price', 'price_discount', 'description', 'size')
+    
     def __init__(self, config_file='config.json'):
+        self.config_file = config_file
         with open(config_file, 'r', encoding='utf-8') as f:
             self.config = json.load(f)
         
         self.api_config = self.config['api']
         self.device_config = self.config['device']
         self.parsing_config = self.config['parsing']
-        self.translation_cache = {}
+        self.translation_config = self.config.get('translation', {})
+        self.metrics_config = self.config.get('metrics', {})
+        self.images_config = self.config.get('images', {})
+        self.index_config = self.config.get('index', {})
+        self.image_mirror = None
+        self.image_mirror_unavailable = False
+        self.translation_cache = TranslationCache(
+            self.translation_config.get('cache_file', 'products/translations.sqlite'),
+            max_size=self.translation_config.get('memory_size', 5000),
+            ttl_days=self.translation_config.get('ttl_days')
+        )
+        self.glossary = None
+        self._translator_local = threading.local()
+        self._translation_executor = None
+        self._translation_inflight = {}
+        self.rate_limiter = AdaptiveRateLimiter(
+            rate=self.parsing_config.get('rate_limit', 5.0),
+            min_rate=self.parsing_config.get('rate_limit_min', 0.5),
+            max_rate=self.parsing_config.get('rate_limit_max', 50.0)
+        )
         
     def translate_param(self, chinese_text):
-        translations = {
-            '系列': 'Серия',
-            '序列号': 'Серийный номер',
-            '材质': 'Материал',
-            '整体重量': 'Вес',
-            '参考尺码': 'Размер',
-            '尺寸': 'Размеры',
-            '配件': 'Комплект',
-            '商品编码': 'Код товара',
-            '包身长度': 'Длина',
-            '包身高度': 'Высота',
-            '包身厚度': 'Ширина',
-            '钥匙': 'Ключ',
-            '小锁': 'Маленький замок',
-            '锁': 'Замок',
-            '肩带': 'Ремешок',
-            '防尘袋': 'Пылезащитный мешок',
-            '盒子': 'Коробка',
-            '说明书': 'Инструкция',
-            '卡片': 'Карточка',
-            '保卡': 'Гарантийная карта'
-        }
-        return translations.get(chinese_text, chinese_text)
+        if not has_chinese(chinese_text):
+            return chinese_text
+        return self.get_glossary().translate(chinese_text) or chinese_text
+    
+    def get_glossary(self):
+        if self.glossary is None:
+            glossary = Glossary()
+            if self.translation_config.get('learn_glossary', True):
+                try:
+                    glossary.learn(self.translation_cache.iter_entries(self.glossary_learn_chars),
+                                   self.glossary_learn_chars)
+                except sqlite3.Error as e:
+                    print(f"⚠️ Не удалось загрузить переводы в глоссарий: {e}")
+            glossary.update(GLOSSARY)
+            
+            glossary_file = self.translation_config.get('glossary_file', 'glossary.json')
+            if glossary_file and Path(glossary_file).exists():
+                try:
+                    with open(glossary_file, 'r', encoding='utf-8') as f:
+                        glossary.update(json.load(f))
+                except Exception as e:
+                    print(f"⚠️ Не удалось прочитать глоссарий {glossary_file}: {e}")
+            
+            self.glossary = glossary
+        return self.glossary
+    
+    @property
+    def glossary_learn_chars(self):
+        return self.translation_config.get('glossary_learn_chars', 6)
+    
+    def store_translations(self, translations):
+        self.translation_cache.set_many(translations)
+        if self.translation_config.get('learn_glossary', True):
+            self.get_glossary().learn(translations.items(), self.glossary_learn_chars)
+    
+    def _get_translator(self):
+        translator = getattr(self._translator_local, 'translator', None)
+        if translator is None:
+            from deep_translator import GoogleTranslator
+            translator = GoogleTranslator(source='zh-CN', target='ru')
+            self._translator_local.translator = translator
+        return translator
+    
+    def _get_translation_executor(self):
+        if self._translation_executor is None:
+            self._translation_executor = ThreadPoolExecutor(
+                max_workers=max(1, self.translation_config.get('workers', 4)),
+                thread_name_prefix='translate'
+            )
+        return self._translation_executor
+    
+    def shutdown_translation(self):
+        if self._translation_executor is not None:
+            self._translation_executor.shutdown(wait=False)
+            self._translation_executor = None
     
     def translate_chinese_to_russian(self, text):
         if not text or not isinstance(text, str):
             return text
         
-        has_chinese = any('\u4e00' <= char <= '\u9fff' for char in text)
-        
-        if not has_chinese:
+        if not has_chinese(text):
             return text
         
-        if text in self.translation_cache:
-            return self.translation_cache[text]
+        cached = self.translation_cache.get(text)
+        if cached is not None:
+            return cached
         
-        try:
-            translator = GoogleTranslator(source='zh-CN', target='ru')
-            translated = translator.translate(text)
-            self.translation_cache[text] = translated
-            return translated
-        except Exception as e:
-            return text
+        glossary = self.get_glossary()
+        local = glossary.translate(text)
+        if local is not None:
+            glossary.hits += 1
+            return local
+        
+        return text
     
-    def translate_product_name(self, name):
-        if not name or not isinstance(name, str):
-            return name
+    def _translate_text(self, text, translations=None):
+        if translations is not None and text in translations:
+            return translations[text]
+        return self.translate_chinese_to_russian(text)
+    
+    def chunk_translation_texts(self, texts):
+        chunk_chars = self.translation_config.get('chunk_chars', 4500)
+        chunk_size = self.translation_config.get('chunk_size', 50)
+        
+        chunk = []
+        chunk_len = 0
+        for text in texts:
+            if chunk and (chunk_len + len(text) + 1 > chunk_chars or len(chunk) >= chunk_size):
+                yield chunk
+                chunk = []
+                chunk_len = 0
+            chunk.append(text)
+            chunk_len += len(text) + 1
+        
+        if chunk:
+            yield chunk
+    
+    def translate_chunk(self, chunk):
+        translator = self._get_translator()
+        
+        if len(chunk) > 1:
+            try:
+                translated = translator.translate('\n'.join(chunk))
+                parts = translated.split('\n') if translated else []
+                if len(parts) == len(chunk) and all(p.strip() for p in parts):
+                    return {text: part.strip() for text, part in zip(chunk, parts)}
+            except Exception as e:
+                pass
+        
+        result = {}
+        for text in chunk:
+            try:
+                translated = translator.translate(text)
+                if translated:
+                    result[text] = translated
+            except Exception as e:
+                pass
+        return result
+    
+    def _lookup_translations(self, texts):
+        translations = {}
+        pending = []
+        hits = 0
+        local_hits = 0
+        glossary = self.get_glossary()
+        
+        for text in texts:
+            if not text or not isinstance(text, str) or text in translations:
+                continue
+            if not has_chinese(text):
+                translations[text] = text
+                continue
+            
+            cached = self.translation_cache.get(text)
+            if cached is not None:
+                translations[text] = cached
+                hits += 1
+                continue
+            
+            local = glossary.translate(text)
+            if local is not None:
+                translations[text] = local
+                local_hits += 1
+            else:
+                translations[text] = text
+                pending.append(text)
+        
+        glossary.hits += local_hits
+        metric_inc('translation_lookups_total', hits, result='hit')
+        metric_inc('translation_lookups_total', local_hits, result='glossary')
+        metric_inc('translation_lookups_total', len(pending), result='miss')
+        return translations, pending
+    
+    def _translation_chunks(self, texts):
+        bulk = [t for t in texts if '\n' not in t]
+        single = [[t] for t in texts if '\n' in t]
+        return list(self.chunk_translation_texts(bulk)) + single
+    
+    async def translate_many_async(self, texts):
+        translations, pending = self._lookup_translations(texts)
+        loop = asyncio.get_running_loop()
+        
+        waiting = {}
+        owned = []
+        for text in pending:
+            future = self._translation_inflight.get(text)
+            if future is None:
+                future = loop.create_future()
+                self._translation_inflight[text] = future
+                owned.append(text)
+            waiting[text] = future
+        
+        async def run_chunk(chunk):
+            translated = {}
+            try:
+                with metric_timer('translation_request_seconds'):
+                    translated = await loop.run_in_executor(
+                        self._get_translation_executor(), self.translate_chunk, chunk
+                    )
+                metric_inc('translation_strings_total', len(chunk))
+                self.store_translations(translated)
+            except Exception as e:
+                pass
+            finally:
+                for text in chunk:
+                    future = self._translation_inflight.pop(text, None)
+                    if future is not None and not future.done():
+                        future.set_result(translated.get(text))
         
+        if owned:
+            await asyncio.gather(*(run_chunk(chunk) for chunk in self._translation_chunks(owned)))
+        
+        for text, future in waiting.items():
+            translated = await future
+            if translated:
+                translations[text] = translated
+        
+        return translations
+    
+    def split_product_name(self, name):
         match = re.match(r'^([A-Za-z0-9\s]+)', name)
         
         if match:
-            latin_part = match.group(1).strip()
-            chinese_part = name[len(match.group(1)):].strip()
-            
+            return match.group(1).strip(), name[len(match.group(1)):].strip()
+        return None, name
+    
+    def translate_product_name(self, name, translations=None):
+        if not name or not isinstance(name, str):
+            return name
+        
+        latin_part, chinese_part = self.split_product_name(name)
+        
+        if latin_part is not None:
             if chinese_part:
-                translated_chinese = self.translate_chinese_to_russian(chinese_part)
+                translated_chinese = self._translate_text(chinese_part, translations)
                 return f"{latin_part} {translated_chinese}"
             else:
                 return latin_part
         else:
-            return self.translate_chinese_to_russian(name)
+            return self._translate_text(name, translations)
     
-    def extract_product_data(self, raw_item, brand_filter=None):
+    def collect_translation_texts(self, products, api_results):
+        texts = []
+        
+        for product in products:
+            name = product.name
+            if name and isinstance(name, str):
+                texts.append(self.split_product_name(name)[1])
+        
+        for api_data in api_results:
+            if not isinstance(api_data, dict) or not isinstance(api_data.get('data'), dict):
+                continue
+            product_attr = api_data['data'].get('productAttr') or []
+            for item in product_attr:
+                if not isinstance(item, dict):
+                    continue
+                for val in item.get('values') or []:
+                    if isinstance(val, dict):
+                        texts.append(val.get('value', ''))
+                    elif isinstance(val, str):
+                        texts.append(val)
+        
+        return texts
+    
+    def unwrap_product(self, raw_item):
         if 'product' in raw_item and isinstance(raw_item['product'], dict):
-            product = raw_item['product']
-        else:
-            product = raw_item
+            return raw_item['product']
+        return raw_item
+    
+    def raw_product_id(self, raw_item):
+        product = self.unwrap_product(raw_item)
+        return str(product.get('id') or product.get('productId') or 
+                   product.get('spuId') or product.get('sku', ''))
+    
+    def extract_product_data(self, raw_item, brand_filter=None):
+        product = self.unwrap_product(raw_item)
         
         brand = product.get('brand') or product.get('brandName', '')
         
         if brand_filter and brand.lower() != brand_filter.lower():
             return None
         
-        product_id = str(product.get('id') or product.get('productId') or 
-                        product.get('spuId') or product.get('sku', ''))
+        product_id = self.raw_product_id(product)
         
         name = product.get('name') or product.get('productName') or product.get('title', '')
         
@@ -136,73 +1626,70 @@ class ZzerParser:
         size = product.get('sizeName', '')
         sku = product.get('sku', '')
         
-        name_ru = self.translate_product_name(name) if name else ''
-        
+        return ProductRecord(
+            product_id,
+            sku=sku,
+            name=name,
+            description=f"{condition_raw}. Size: {size}" if size else condition_raw,
+            price=price,
+            price_rub=f"{price_rub:.2f}" if price_rub else '',
+            price_discount=price_discount,
+            price_rub_discount=f"{price_rub_discount:.2f}" if price_rub_discount else '',
+            brand=brand,
+            size=size,
+            condition=condition,
+            main_image=main_image
+        )
+    
+    def build_device_params(self):
         return {
-            'id': product_id,
-            'sku': sku,
-            'article': sku,
-            'name': name,
-            'name_ru': name_ru,
-            'description': f"{condition_raw}. Size: {size}" if size else condition_raw,
-            'price': price,
-            'price_rub': f"{price_rub:.2f}" if price_rub else '',
-            'price_discount': price_discount,
-            'price_rub_discount': f"{price_rub_discount:.2f}" if price_rub_discount else '',
-            'currency': 'CNY',
-            'brand': brand,
-            'size': size,
-            'condition': condition,
-            'main_image': main_image if main_image else '',
-            'city': '',
-            'all_images': [main_image] if main_image else [],
-            'details': {}
+            'deviceId': self.device_config['deviceId'],
+            'fmt': self.device_config['fmt'],
+            'h5Version': self.device_config['h5Version'],
+            'langType': self.device_config['langType'],
+            'mpb': self.device_config['mpb'],
+            'mpm': self.device_config['mpm'],
+            'mt': self.device_config['mt'],
+            'plat': str(self.device_config['plat']),
+            'ts': str(int(time.time())),
+            'version': self.device_config['version'],
+            'sn': ''
         }
     
-    async def get_product_details(self, page, product_id, sku):
+    def build_detail_params(self, product_id):
+        params = self.build_device_params()
+        params['id'] = str(product_id)
+        return params
+    
+    async def fetch_details_with_status(self, page, items):
+        if not items:
+            return []
+        
+        api_url = f"{self.api_config['base_url']}/product/api/v1/product/detail"
+        params_list = [self.build_detail_params(product_id) for product_id, _ in items]
+        
+        try:
+            with metric_timer('detail_evaluate_seconds'):
+                results = await page.evaluate(DETAIL_BATCH_SCRIPT, {'url': api_url, 'items': params_list})
+        except Exception as e:
+            print(f"  ⚠️ Ошибка пакетного запроса ({len(items)} товаров): {e}")
+            return [(0, None)] * len(items)
+        
+        if not isinstance(results, list) or len(results) != len(items):
+            return [(0, None)] * len(items)
+        
+        return [(r.get('status', 0), r.get('data')) if isinstance(r, dict) else (0, None) for r in results]
+    
+    def parse_product_details(self, api_data, sku, translations=None):
         city_code = ''
         article = sku
         
         try:
-            detail_params = {
-                'deviceId': self.device_config['deviceId'],
-                'fmt': self.device_config['fmt'],
-                'h5Version': self.device_config['h5Version'],
-                'id': str(product_id),
-                'langType': self.device_config['langType'],
-                'mpb': self.device_config['mpb'],
-                'mpm': self.device_config['mpm'],
-                'mt': self.device_config['mt'],
-                'plat': str(self.device_config['plat']),
-                'ts': str(int(time.time())),
-                'version': self.device_config['version'],
-                'sn': ''
-            }
-            
-            api_url = f"{self.api_config['base_url']}/product/api/v1/product/detail"
-            
-            api_data = await page.evaluate(f"""
-                async () => {{
-                    const params = new URLSearchParams({json.dumps(detail_params)});
-                    const response = await fetch('{api_url}?' + params.toString(), {{
-                        method: 'GET',
-                        headers: {{
-                            'Accept': 'application/json'
-                        }}
-                    }});
-                    
-                    if (response.ok) {{
-                        return await response.json();
-                    }}
-                    return null;
-                }}
-            """)
-            
-            if not api_data:
+            if not api_data or not isinstance(api_data, dict):
                 return {'details': {}, 'all_images': [], 'city': '', 'article': article}
             
             code = api_data.get('code')
-            if code not in [0, '0', 100000, '100000'] or not api_data.get('data'):
+            if code not in SUCCESS_CODES or not api_data.get('data'):
                 return {'details': {}, 'all_images': [], 'city': '', 'article': article}
             
             product_data = api_data.get('data', {})
@@ -235,10 +1722,10 @@ class ZzerParser:
                     if isinstance(val, dict):
                         value_text = val.get('value', '')
                         if value_text:
-                            translated_value = self.translate_chinese_to_russian(value_text)
+                            translated_value = self._translate_text(value_text, translations)
                             values_list.append(translated_value)
                     elif isinstance(val, str):
-                        translated_value = self.translate_chinese_to_russian(val)
+                        translated_value = self._translate_text(val, translations)
                         values_list.append(translated_value)
                 
                 if values_list:
@@ -275,284 +1762,1006 @@ class ZzerParser:
                 'article': article
             }
             
-        except Exception as e:
-            return {'details': {}, 'all_images': [], 'city': '', 'article': sku}
+        except Exception as e:
+            return {'details': {}, 'all_images': [], 'city': '', 'article': sku}
+    
+    def merge_product_details(self, product, details_data):
+        product.set_details(details_data.get('details', {}))
+        product.city = intern_text(details_data.get('city', ''))
+        product.article = details_data.get('article', product.sku)
+        product.all_images = details_data.get('all_images', [])
+        return product
+    
+    async def open_detail_pages(self, context, page):
+        pages_count = max(1, self.parsing_config.get('detail_pages', 1))
+        pages = [page]
+        
+        for _ in range(pages_count - 1):
+            try:
+                extra_page = await context.new_page()
+                await extra_page.goto(page.url, wait_until='domcontentloaded', timeout=30000)
+                pages.append(extra_page)
+            except Exception as e:
+                print(f"⚠️ Не удалось открыть дополнительную страницу: {e}")
+                break
+        
+        return pages
+    
+    async def create_http_client(self, context, page, task):
+        if load_httpx() is None:
+            print("⚠️ httpx не установлен, карточки запрашиваются через браузер")
+            return None
+        
+        try:
+            cookies = await context.cookies()
+            user_agent = await page.evaluate('navigator.userAgent')
+        except Exception as e:
+            print(f"⚠️ Не удалось получить сессию браузера: {e}")
+            return None
+        
+        origin = 'https://mix.goshare2.com'
+        headers = {
+            'Accept': 'application/json',
+            'User-Agent': user_agent,
+            'Origin': origin,
+            'Referer': page.url if page.url.startswith('http') else origin + '/'
+        }
+        
+        client = DetailHttpClient(
+            f"{self.api_config['base_url']}/product/api/v1/product/detail",
+            headers,
+            cookies,
+            max_connections=self._task_option(task, 'http_connections', 20),
+            fallback_after=self._task_option(task, 'http_fallback_after', 5),
+            throttle_codes=self.parsing_config.get('throttle_codes', [])
+        )
+        print(f"Прямые HTTP запросы карточек ({'HTTP/2' if client.http2 else 'HTTP/1.1'}, cookies: {len(cookies)})")
+        return client
+    
+    def classify_detail_response(self, status, api_data):
+        if isinstance(api_data, dict) and api_data.get('code') in SUCCESS_CODES:
+            return 'ok'
+        if status == 0 or status in THROTTLE_STATUSES:
+            return 'throttled'
+        throttle_codes = [str(code) for code in self.parsing_config.get('throttle_codes', [])]
+        if isinstance(api_data, dict) and str(api_data.get('code')) in throttle_codes:
+            return 'throttled'
+        return 'failed'
+    
+    def backoff_delay(self, attempt):
+        base = self.parsing_config.get('retry_backoff', 1.0)
+        return min(30.0, base * 2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+    
+    async def fetch_detail_chunk(self, page, items, http_client=None):
+        if http_client is None or http_client.disabled:
+            return await self.fetch_details_with_status(page, items)
+        
+        results = await http_client.fetch_many([self.build_detail_params(product_id) for product_id, _ in items])
+        retry = [i for i, (status, api_data) in enumerate(results)
+                 if status == 0 or self.classify_detail_response(status, api_data) == 'failed']
+        if retry:
+            with metric_timer('rate_limit_wait_seconds'):
+                await self.rate_limiter.acquire(len(retry))
+            browser_results = await self.fetch_details_with_status(page, [items[i] for i in retry])
+            for i, result in zip(retry, browser_results):
+                results[i] = result
+        return results
+    
+    async def fetch_details_concurrently(self, pages, products, http_client=None, fetch_stats=None):
+        concurrency = max(1, self.parsing_config.get('detail_concurrency', 4))
+        chunk_size = max(1, self.parsing_config.get('detail_batch_size', 10))
+        max_retries = self.parsing_config.get('max_retries', 3)
+        semaphore = asyncio.Semaphore(concurrency)
+        limiter = self.rate_limiter
+        if fetch_stats is None:
+            fetch_stats = {'retries': 0, 'degraded': 0}
+        
+        chunks = [products[i:i + chunk_size] for i in range(0, len(products), chunk_size)]
+        
+        async def fetch(idx, chunk):
+            page = pages[idx % len(pages)]
+            items = [(p.id, p.sku) for p in chunk]
+            api_results = [None] * len(items)
+            pending = list(range(len(items)))
+            attempt = 0
+            
+            async with semaphore:
+                while pending:
+                    with metric_timer('rate_limit_wait_seconds'):
+                        await limiter.acquire(len(pending))
+                    with metric_timer('detail_batch_seconds'):
+                        results = await self.fetch_detail_chunk(page, [items[i] for i in pending], http_client)
+                    
+                    retry = []
+                    for i, (status, api_data) in zip(pending, results):
+                        api_results[i] = api_data
+                        outcome = self.classify_detail_response(status, api_data)
+                        metric_inc('detail_responses_total', outcome=outcome)
+                        if outcome == 'ok':
+                            limiter.on_success()
+                        elif outcome == 'throttled':
+                            limiter.on_throttle()
+                            retry.append(i)
+                    
+                    if not retry or attempt >= max_retries:
+                        break
+                    
+                    attempt += 1
+                    fetch_stats['retries'] += len(retry)
+                    metric_inc('detail_retries_total', len(retry))
+                    await asyncio.sleep(self.backoff_delay(attempt))
+                    pending = retry
+            
+            degraded = sum(
+                1 for api_data in api_results
+                if not (isinstance(api_data, dict) and api_data.get('code') in SUCCESS_CODES)
+            )
+            fetch_stats['degraded'] += degraded
+            metric_inc('products_degraded_total', degraded)
+            return api_results
+        
+        chunk_results = await asyncio.gather(*(fetch(i, c) for i, c in enumerate(chunks)))
+        return [api_data for chunk in chunk_results for api_data in chunk]
+    
+    def _task_option(self, task, key, default=None):
+        if key in task:
+            return task[key]
+        return self.parsing_config.get(key, default)
+    
+    def create_wait_timeout(self):
+        return AdaptiveTimeout(
+            initial=self.parsing_config.get('wait_timeout', 3.0),
+            minimum=self.parsing_config.get('wait_timeout_min', 0.5),
+            maximum=self.parsing_config.get('wait_timeout_max', 10.0)
+        )
+    
+    async def wait_for_product_list(self, collector, since, wait_timeout):
+        started = time.perf_counter()
+        if await collector.wait_for_response(since, wait_timeout.value):
+            wait_timeout.observe(time.perf_counter() - started)
+            return True
+        wait_timeout.expired()
+        return False
+    
+    async def open_start_page(self, page, warm=False):
+        print("Открытие: https://mix.goshare2.com/wv/pc/index/")
+        if warm:
+            await page.goto('https://mix.goshare2.com/wv/pc/index/', wait_until='domcontentloaded', timeout=30000)
+            return False
+        
+        await page.goto('https://mix.goshare2.com/wv/pc/index/', wait_until='networkidle', timeout=30000)
+        await self.prepare_listing_page(page)
+        return True
+    
+    async def prepare_listing_page(self, page):
+        try:
+            await page.wait_for_selector('[class*="tab"]', timeout=self.parsing_config.get('wait_timeout_max', 10.0) * 1000)
+        except Exception as e:
+            print("⚠️ Вкладки не найдены, продолжаем")
+        
+        print("Удаление оверлеев...")
+        await page.evaluate('''
+            () => {
+                const loginIframe = document.getElementById('zzer-login-iframe');
+                if (loginIframe) loginIframe.remove();
+                
+                document.querySelectorAll('.login-view, .not-login-model').forEach(e => e.remove());
+                document.querySelectorAll('[class*="mask"], [class*="overlay"], [class*="modal"]').forEach(e => e.remove());
+                document.querySelectorAll('.item-wrap').forEach(e => e.remove());
+            }
+        ''')
+    
+    def load_storage_state(self):
+        path = self.parsing_config.get('storage_state')
+        if not path or not Path(path).exists():
+            return None
+        
+        age = time.time() - Path(path).stat().st_mtime
+        if age > self.parsing_config.get('storage_state_ttl', 12) * 3600:
+            print("Сохраненная сессия браузера устарела, холодный старт")
+            return None
+        return path
+    
+    async def save_storage_state(self, context):
+        path = self.parsing_config.get('storage_state')
+        if not path:
+            return
+        
+        path = Path(path)
+        temp_path = path.with_name(f'{path.name}.{os.getpid()}.{id(context)}.tmp')
+        try:
+            state = await context.storage_state()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.replace(temp_path, path)
+        except Exception as e:
+            print(f"⚠️ Не удалось сохранить сессию браузера: {e}")
+    
+    async def start_session(self, context, page, task, storage_state=None):
+        warm = storage_state is not None and self._task_option(task, 'list_mode', 'api') == 'api'
+        started = time.perf_counter()
+        prepared = await self.open_start_page(page, warm)
+        elapsed = time.perf_counter() - started
+        
+        metric_observe('startup_seconds', elapsed, mode='warm' if warm else 'cold')
+        print(f"⏱ {'Теплый' if warm else 'Холодный'} старт: {elapsed:.2f}с")
+        if not warm:
+            await self.save_storage_state(context)
+        return prepared
+    
+    async def open_brand_listing(self, page, collector, brand_name, wait_timeout):
+        print("Переход в раздел 'Купить'...")
+        since = collector.responses
+        await page.evaluate('''
+            () => {
+                const tabs = document.querySelectorAll('[class*="tab"], [class*="nav"] > *');
+                for (const tab of tabs) {
+                    if (tab.textContent.trim() === '购买') {
+                        tab.click();
+                        return;
+                    }
+                }
+            }
+        ''')
+        await collector.wait_for_response(since, wait_timeout.maximum)
+        
+        if not brand_name:
+            return
+        
+        print(f"Выбор бренда {brand_name}...")
+        since = collector.responses
+        await page.evaluate(f'''
+            () => {{
+                const elements = document.querySelectorAll('*');
+                for (const el of elements) {{
+                    const text = (el.textContent || '').trim();
+                    if (text.toLowerCase().includes('{brand_name.lower()}') && text.length < 30) {{
+                        el.scrollIntoView({{behavior: 'instant', block: 'center'}});
+                        el.click();
+                        return text;
+                    }}
+                }}
+                return null;
+            }}
+        ''')
+        if not await collector.wait_for_response(since, wait_timeout.maximum):
+            print("⚠️ Список товаров бренда не загрузился")
+    
+    async def harvest_via_scroll(self, page, collector, brand_name, max_products, wait_timeout):
+        print(f"Начальное количество товаров: {len(collector)}")
+        
+        print("\nСкроллинг для загрузки товаров...")
+        idle_limit = self.parsing_config.get('scroll_idle_limit', 3)
+        no_new_count = 0
+        for i in range(200):
+            prev = len(collector)
+            since = collector.responses
+            await page.evaluate('window.scrollTo(0, document.body.scrollHeight)')
+            received = await self.wait_for_product_list(collector, since, wait_timeout)
+            
+            if len(collector) >= max_products:
+                print(f"\n✓ Достигнут лимит: {max_products} товаров")
+                break
+            
+            if len(collector) > prev:
+                no_new_count = 0
+                if len(collector) % 100 == 0:
+                    print(f"  ✓ Загружено: {len(collector)} товаров {brand_name or ''}")
+            elif not received:
+                no_new_count += 1
+                if no_new_count >= idle_limit:
+                    print(f"\n✓ Все товары загружены")
+                    break
+    
+    def build_list_payloads(self, task, first_page, count):
+        payload = dict(task.get('payload', {}))
+        size_key = 'pageSize' if 'pageSize' in payload else 'size'
+        page_size = int(payload.get(size_key) or self.parsing_config.get('page_size', 20))
+        payload[size_key] = page_size
+        
+        payloads = []
+        for page_no in range(first_page, first_page + count):
+            page_payload = dict(payload)
+            page_payload['page'] = page_no
+            payloads.append(page_payload)
+        return payloads, page_size
+    
+    async def harvest_via_api(self, page, task, collector, max_products):
+        endpoint = self.api_config['endpoints'].get(task.get('endpoint', ''))
+        if not endpoint:
+            print(f"⚠️ Endpoint '{task.get('endpoint')}' не найден в config.json")
+            return False
+        
+        api_url = f"{self.api_config['base_url']}{endpoint}"
+        prefetch = max(1, self._task_option(task, 'list_prefetch', 3))
+        params = self.build_device_params()
+        page_no = int(task.get('payload', {}).get('page', 1))
+        first_page = page_no
+        
+        print(f"API запрос: {api_url}")
+        
+        while True:
+            payloads, page_size = self.build_list_payloads(task, page_no, prefetch)
+            
+            try:
+                results = await page.evaluate(LIST_PAGES_SCRIPT, {
+                    'url': api_url, 'params': params, 'payloads': payloads
+                })
+            except Exception as e:
+                print(f"⚠️ Ошибка запроса списка: {e}")
+                results = [None] * len(payloads)
+            
+            for payload, data in zip(payloads, results or []):
+                if not isinstance(data, dict) or str(data.get('code', '')) != '100000':
+                    if payload['page'] == first_page:
+                        return False
+                    print(f"⚠️ Страница {payload['page']} не получена, останавливаемся")
+                    return True
+                
+                items = (data.get('data') or {}).get('list') or []
+                collector.add_items(items)
+                
+                if len(collector) >= max_products:
+                    print(f"\n✓ Достигнут лимит: {max_products} товаров")
+                    return True
+                
+                if len(items) < page_size:
+                    print(f"\n✓ Все товары загружены (страниц: {payload['page'] - first_page + 1})")
+                    collector.complete = True
+                    return True
+            
+            print(f"  ✓ Загружено: {len(collector)} товаров")
+            
+            page_no += prefetch
+    
+    async def harvest_products(self, page, task, collector, brand_name, max_products, timer, prepared=False):
+        list_mode = self._task_option(task, 'list_mode', 'api')
+        
+        if list_mode == 'api':
+            with timer.phase('api_list'):
+                harvested = await self.harvest_via_api(page, task, collector, max_products)
+            if harvested:
+                return
+            print("⚠️ API пагинация недоступна, переключаемся на скроллинг")
+            if not prepared:
+                await self.prepare_listing_page(page)
+        
+        wait_timeout = self.create_wait_timeout()
+        with timer.phase('brand_listing'):
+            await self.open_brand_listing(page, collector, brand_name, wait_timeout)
+        with timer.phase('scroll'):
+            await self.harvest_via_scroll(page, collector, brand_name, max_products, wait_timeout)
+    
+    async def process_products(self, context, page, task, captured_products):
+        max_products = self.parsing_config['max_products']
+        brand_name = task.get('brand_name', 'Chanel')
+        
+        batch_size = self.parsing_config.get('batch_size', 50)
+        
+        _, json_filename_temp = self.result_paths(task)
+        
+        processed_products = []
+        processed_ids = set()
+        
+        if json_filename_temp.exists():
+            try:
+                self.repair_checkpoint(json_filename_temp)
+                for product in self.iter_checkpoint(json_filename_temp):
+                    product_id = str(product.get('id', ''))
+                    if product_id in processed_ids:
+                        continue
+                    processed_ids.add(product_id)
+                    processed_products.append(ProductRecord.from_dict(product))
+                print(f"✓ Найдено {len(processed_ids)} обработанных товаров, продолжаем...")
+            except:
+                processed_products = []
+                processed_ids = set()
+        
+        products_to_process = [raw for raw in captured_products[:max_products]
+                               if self.raw_product_id(raw) not in processed_ids]
+        harvested_ids = {self.raw_product_id(raw) for raw in captured_products}
+        captured_products.clear()
+        start_idx = len(processed_products)
+        total_count = start_idx + len(products_to_process)
+        
+        print(f"\nОбработка {total_count} товаров (батчами по {batch_size})")
+        print(f"Прогресс: {start_idx}/{total_count}\n")
+        
+        detail_index = None
+        incremental_stats = {'new': 0, 'changed': 0, 'unchanged': 0, 'removed': 0}
+        if self._task_option(task, 'incremental', False):
+            detail_index = self.load_detail_index(task)
+            print(f"🔁 Инкрементальный режим: в индексе {len(detail_index)} товаров")
+        
+        detail_pages = await self.open_detail_pages(context, page)
+        
+        fetch_stats = {'retries': 0, 'degraded': 0}
+        http_client = None
+        if self._task_option(task, 'detail_mode', 'browser') == 'http' and products_to_process:
+            http_client = await self.create_http_client(context, page, task)
+        
+        try:
+            for batch_start in range(0, len(products_to_process), batch_size):
+                batch_end = min(batch_start + batch_size, len(products_to_process))
+                batch_products = products_to_process[batch_start:batch_end]
+            
+                print(f"\n{'─'*60}")
+                print(f"📦 Батч {batch_start // batch_size + 1}: товары {start_idx + batch_start + 1}-{start_idx + batch_end}")
+                print(f"{'─'*60}\n")
+            
+                products = []
+                for i, raw_product in enumerate(batch_products):
+                    idx = start_idx + batch_start + i + 1
+                    product = self.extract_product_data(raw_product, brand_filter=brand_name)
+                
+                    if not product:
+                        continue
+                
+                    print(f"{idx}. {product.name[:40]}... ¥{product.price_discount}")
+                    products.append(product)
+                products_to_process[batch_start:batch_end] = [None] * (batch_end - batch_start)
+            
+                await self.enrich_products(detail_pages, products, detail_index, incremental_stats, http_client,
+                                           fetch_stats)
+            
+                for product in products:
+                    processed_products.append(product)
+                    processed_ids.add(product.id)
+                metric_inc('products_processed_total', len(products))
+            
+                self.save_batch(products, task, len(processed_products), total_count)
+        
+        finally:
+            if http_client is not None:
+                if http_client.rejected:
+                    print(f"⚠️ Отклонено прямых запросов: {http_client.rejected} (запрошены через браузер)")
+                await http_client.close()
+        
+        print(f"\n🚦 Запросы карточек: скорость {self.rate_limiter.rate:.1f}/с, повторов {fetch_stats['retries']}, "
+              f"без деталей {fetch_stats['degraded']}")
+        
+        if detail_index is not None:
+            incremental_stats['removed'] = sum(1 for product_id in detail_index if product_id not in harvested_ids)
+            self.print_incremental_stats(incremental_stats)
+        
+        return processed_products
+    
+    async def process_captured(self, context, page, task, captured_products):
+        shards = self._task_option(task, 'shards', 1)
+        if shards > 1:
+            return await self.process_sharded(task, captured_products, shards)
+        return await self.process_products(context, page, task, captured_products)
     
-    async def parse_task(self, task):
+    def shard_queue_path(self, task):
+        json_filename, _ = self.result_paths(task)
+        return json_filename.with_name(f'{json_filename.stem}_queue.sqlite')
+    
+    async def process_sharded(self, task, captured_products, shards):
         max_products = self.parsing_config['max_products']
-        brand_name = task.get('brand_name', 'Chanel')
-        brand_id = task.get('payload', {}).get('brandId', '223')
+        _, json_filename_temp = self.result_paths(task)
         
-        async with async_playwright() as p:
-            print("\n" + "="*60)
-            print(f"Задача: {task['name']}")
-            print(f"Бренд: {brand_name} (ID: {brand_id})")
-            print(f"Максимум товаров: {max_products}")
-            print("="*60 + "\n")
-            
-            print("Запуск браузера...")
-            browser = await p.chromium.launch(headless=True)
-            
-            context = await browser.new_context(
-                viewport={'width': 1920, 'height': 1080},
-                user_agent='Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36'
-            )
+        processed_ids = set()
+        if json_filename_temp.exists():
+            self.repair_checkpoint(json_filename_temp)
+            processed_ids = {str(p.get('id', '')) for p in self.iter_checkpoint(json_filename_temp)}
+        
+        queue = ShardQueue(self.shard_queue_path(task), self._task_option(task, 'shard_lease', 300))
+        try:
+            queue.add((product_id, raw) for product_id, raw in
+                      ((self.raw_product_id(raw), raw) for raw in captured_products[:max_products])
+                      if product_id not in processed_ids)
+            harvested_ids = {self.raw_product_id(raw) for raw in captured_products}
+            captured_products.clear()
             
-            page = await context.new_page()
+            counts = queue.counts()
+            print(f"\n🧩 Шардированная обработка: {sum(counts.values())} товаров в очереди, "
+                  f"уже готово {counts['done']}, воркеров {shards}")
             
-            captured_products = []
-            captured_ids = set()
+            await self.run_shard_workers(task, queue, shards)
             
-            async def capture_response(response):
-                url = response.url
-                if 'productList' in url:
-                    try:
-                        data = await response.json()
-                        code = str(data.get('code', ''))
-                        if code == '100000' and data.get('data') and data['data'].get('list'):
-                            for item in data['data']['list']:
-                                product = item.get('product') or item
-                                if product.get('id'):
-                                    brand = product.get('brandName', '').lower()
-                                    if brand_name.lower() in brand:
-                                        pid = product['id']
-                                        if pid not in captured_ids:
-                                            captured_ids.add(pid)
-                                            captured_products.append(item)
-                    except:
-                        pass
-            
-            page.on('response', capture_response)
+            counts = queue.counts()
+            finished = not (counts['pending'] or counts['leased'])
+            self.merge_worker_stats(task, queue, harvested_ids if finished else None)
+            if not finished:
+                print(f"⚠️ Не обработано {counts['pending'] + counts['leased']} товаров, "
+                      f"очередь сохранена для продолжения: {queue.path}")
+                return []
             
-            try:
-                print("Открытие: https://mix.goshare2.com/wv/pc/index/")
-                await page.goto('https://mix.goshare2.com/wv/pc/index/', wait_until='networkidle', timeout=30000)
-                await asyncio.sleep(2)
-                
-                print("Удаление оверлеев...")
-                await page.evaluate('''
-                    () => {
-                        const loginIframe = document.getElementById('zzer-login-iframe');
-                        if (loginIframe) loginIframe.remove();
-                        
-                        document.querySelectorAll('.login-view, .not-login-model').forEach(e => e.remove());
-                        document.querySelectorAll('[class*="mask"], [class*="overlay"], [class*="modal"]').forEach(e => e.remove());
-                        document.querySelectorAll('.item-wrap').forEach(e => e.remove());
-                    }
-                ''')
-                await asyncio.sleep(1)
-                
-                print("Переход в раздел 'Купить'...")
-                await page.evaluate('''
-                    () => {
-                        const tabs = document.querySelectorAll('[class*="tab"], [class*="nav"] > *');
-                        for (const tab of tabs) {
-                            if (tab.textContent.trim() === '购买') {
-                                tab.click();
-                                return;
-                            }
-                        }
-                    }
-                ''')
-                await asyncio.sleep(3)
-                
-                print(f"Выбор бренда {brand_name}...")
-                await page.evaluate(f'''
-                    () => {{
-                        const elements = document.querySelectorAll('*');
-                        for (const el of elements) {{
-                            const text = (el.textContent || '').trim();
-                            if (text.toLowerCase().includes('{brand_name.lower()}') && text.length < 30) {{
-                                el.scrollIntoView({{behavior: 'instant', block: 'center'}});
-                                el.click();
-                                return text;
-                            }}
-                        }}
-                        return null;
-                    }}
-                ''')
-                await asyncio.sleep(5)
+            merged = 0
+            with open(json_filename_temp, 'a', encoding='utf-8') as f:
+                for product in queue.iter_results():
+                    f.write(json.dumps(product, ensure_ascii=False) + '\n')
+                    merged += 1
+                f.flush()
+                os.fsync(f.fileno())
+            print(f"✓ Объединено результатов воркеров: {merged}")
+        finally:
+            queue.close()
+        
+        queue.remove()
+        return [ProductRecord.from_dict(p) for p in self.iter_unique_products(self.iter_checkpoint(json_filename_temp))]
+    
+    def merge_worker_stats(self, task, queue, harvested_ids):
+        fetch_stats = {'retries': 0, 'degraded': 0}
+        incremental_stats = {'new': 0, 'changed': 0, 'unchanged': 0, 'removed': 0}
+        metrics = _current_metrics.get()
+        
+        for stats in queue.take_worker_stats():
+            for key in fetch_stats:
+                fetch_stats[key] += stats['fetch'].get(key, 0)
+            for key in incremental_stats:
+                incremental_stats[key] += stats['incremental'].get(key, 0)
+            if metrics is not None and stats.get('metrics'):
+                metrics.merge(Metrics.from_dict(stats['metrics']))
+        
+        print(f"\n🚦 Запросы карточек: повторов {fetch_stats['retries']}, без деталей {fetch_stats['degraded']}")
+        
+        if harvested_ids is not None and self._task_option(task, 'incremental', False):
+            detail_index = self.load_detail_index(task)
+            incremental_stats['removed'] = sum(1 for product_id in detail_index if product_id not in harvested_ids)
+            self.print_incremental_stats(incremental_stats)
+    
+    async def run_shard_workers(self, task, queue, shards):
+        spawn = multiprocessing.get_context('spawn')
+        restarts = self._task_option(task, 'shard_restarts', 3)
+        workers = {}
+        
+        def start_worker(number):
+            worker = f'shard-{number}'
+            process = spawn.Process(target=run_shard_worker, name=worker, daemon=True,
+                                    args=(self.config_file, task, str(queue.path), worker, shards))
+            process.start()
+            workers[worker] = process
+        
+        for number in range(shards):
+            start_worker(number)
+        next_number = shards
+        last_done = None
+        
+        while workers:
+            await asyncio.sleep(1)
+            
+            for worker, process in list(workers.items()):
+                if process.is_alive():
+                    continue
+                del workers[worker]
+                process.join()
+                if process.exitcode == 0:
+                    continue
                 
-                print(f"Начальное количество товаров: {len(captured_products)}")
+                released = queue.release(worker)
+                print(f"⚠️ Воркер {worker} завершился с кодом {process.exitcode}, возвращено в очередь: {released}")
+                if restarts > 0 and queue.counts()['pending']:
+                    restarts -= 1
+                    start_worker(next_number)
+                    next_number += 1
+            
+            counts = queue.counts()
+            if counts['done'] != last_done:
+                last_done = counts['done']
+                print(f"  🧩 Готово {counts['done']}/{sum(counts.values())}, воркеров {len(workers)}")
+    
+    async def shard_worker(self, task, queue_path, worker, shards):
+        self.rate_limiter = AdaptiveRateLimiter(
+            rate=self.rate_limiter.rate / shards,
+            min_rate=self.rate_limiter.min_rate / shards,
+            max_rate=self.rate_limiter.max_rate / shards
+        )
+        queue = ShardQueue(queue_path, self._task_option(task, 'shard_lease', 300))
+        metrics = Metrics() if self.metrics_config.get('enabled', True) else None
+        _current_metrics.set(metrics)
+        stats_key = f'{worker}/{os.getpid()}'
+        brand_name = task.get('brand_name', 'Chanel')
+        batch_size = self.parsing_config.get('batch_size', 50)
+        
+        detail_index = None
+        incremental_stats = {'new': 0, 'changed': 0, 'unchanged': 0, 'removed': 0}
+        if self._task_option(task, 'incremental', False):
+            detail_index = self.load_detail_index(task)
+        
+        fetch_stats = {'retries': 0, 'degraded': 0}
+        processed = 0
+        
+        async with async_playwright() as p:
+            browser = await self.launch_browser(p)
+            storage_state = self.load_storage_state()
+            context = await self.new_task_context(browser, task, TrafficStats(), storage_state)
+            http_client = None
+            try:
+                page = await context.new_page()
+                await self.start_session(context, page, task, storage_state)
+                detail_pages = await self.open_detail_pages(context, page)
+                if self._task_option(task, 'detail_mode', 'browser') == 'http':
+                    http_client = await self.create_http_client(context, page, task)
                 
-                print("\nСкроллинг для загрузки товаров...")
-                no_new_count = 0
-                for i in range(200):
-                    prev = len(captured_products)
-                    await page.evaluate('window.scrollTo(0, document.body.scrollHeight)')
-                    await asyncio.sleep(1.5)
-                    
-                    if len(captured_products) >= max_products:
-                        print(f"\n✓ Достигнут лимит: {max_products} товаров")
-                        break
-                    
-                    if len(captured_products) > prev:
-                        no_new_count = 0
-                        if len(captured_products) % 100 == 0:
-                            print(f"  ✓ Загружено: {len(captured_products)} товаров {brand_name}")
-                    else:
-                        no_new_count += 1
-                        if no_new_count > 15:
-                            print(f"\n✓ Все товары загружены")
+                while True:
+                    leased = queue.lease(worker, batch_size)
+                    if not leased:
+                        if not queue.counts()['leased']:
                             break
-                
-                print(f"\n{'='*60}")
-                print(f"Всего перехвачено: {len(captured_products)} товаров {brand_name}")
-                print(f"{'='*60}\n")
-                
-                if not captured_products:
-                    print("⚠️ Не удалось получить товары")
-                    return []
-                
-                products_to_process = captured_products[:max_products]
-                total_count = len(products_to_process)
-                
-                batch_size = self.parsing_config.get('batch_size', 50)
-                
-                results_dir = Path('products')
-                results_dir.mkdir(parents=True, exist_ok=True)
-                json_filename_temp = results_dir / f'brand_{brand_id}_temp.json'
-                
-                processed_products = []
-                start_idx = 0
-                
-                if json_filename_temp.exists():
-                    try:
-                        with open(json_filename_temp, 'r', encoding='utf-8') as f:
-                            temp_data = json.load(f)
-                            if isinstance(temp_data, dict) and 'products' in temp_data:
-                                processed_products = temp_data['products']
-                            else:
-                                processed_products = temp_data
-                        start_idx = len(processed_products)
-                        print(f"✓ Найдено {start_idx} обработанных товаров, продолжаем...")
-                    except:
-                        processed_products = []
-                        start_idx = 0
-                
-                print(f"\nОбработка {total_count} товаров (батчами по {batch_size})")
-                print(f"Прогресс: {start_idx}/{total_count}\n")
-                
-                for batch_start in range(start_idx, total_count, batch_size):
-                    batch_end = min(batch_start + batch_size, total_count)
-                    batch_products = products_to_process[batch_start:batch_end]
-                    
-                    print(f"\n{'─'*60}")
-                    print(f"📦 Батч {batch_start // batch_size + 1}: товары {batch_start + 1}-{batch_end}")
-                    print(f"{'─'*60}\n")
+                        await asyncio.sleep(min(5, queue.lease_seconds))
+                        continue
                     
-                    for i, raw_product in enumerate(batch_products):
-                        idx = batch_start + i + 1
-                        product = self.extract_product_data(raw_product, brand_filter=brand_name)
-                        
-                        if not product:
-                            continue
-                        
-                        print(f"{idx}. {product['name'][:40]}... ¥{product['price_discount']}")
-                        
-                        details_data = await self.get_product_details(page, product['id'], product['sku'])
-                        
-                        product['details'] = details_data.get('details', {})
-                        product['city'] = details_data.get('city', '')
-                        product['article'] = details_data.get('article', product['sku'])
-                        
-                        main_img = product['main_image']
-                        all_images = []
-                        
-                        if main_img:
-                            all_images.append(main_img)
-                        
-                        for img_url in details_data.get('all_images', []):
-                            if img_url != main_img:
-                                all_images.append(img_url)
-                        
-                        product['all_images'] = all_images
-                        processed_products.append(product)
-                        
-                        await asyncio.sleep(0.2)
+                    products = {}
+                    for product_id, raw in leased:
+                        products[product_id] = self.extract_product_data(raw, brand_filter=brand_name)
                     
-                    self.save_batch(processed_products, task, batch_end, total_count)
-                
-                return processed_products
-                
-            except Exception as e:
-                print(f"✗ Ошибка: {e}")
-                import traceback
-                traceback.print_exc()
-                return []
+                    batch = [product for product in products.values() if product]
+                    await self.enrich_products(detail_pages, batch, detail_index, incremental_stats, http_client,
+                                               fetch_stats)
+                    metric_inc('products_processed_total', len(batch))
+                    stats = {
+                        'fetch': fetch_stats,
+                        'incremental': incremental_stats,
+                        'metrics': metrics.to_dict() if metrics is not None else None
+                    }
+                    queue.complete([(product_id, product.to_dict() if product else None)
+                                    for product_id, product in products.items()], stats_key, stats)
+                    processed += len(batch)
+                    print(f"  [{worker}] +{len(batch)} товаров (всего {processed})")
             finally:
+                if http_client is not None:
+                    await http_client.close()
+                await self.close_image_mirror()
+                await context.close()
                 await browser.close()
+                queue.close()
+        
+        print(f"  [{worker}] Завершен: {processed} товаров, повторов {fetch_stats['retries']}, "
+              f"без деталей {fetch_stats['degraded']}")
     
-    def save_batch(self, products, task, current, total):
-        results_dir = Path('products')
-        results_dir.mkdir(parents=True, exist_ok=True)
+    def load_detail_index(self, task):
+        json_filename, _ = self.result_paths(task)
+        if not json_filename.exists():
+            return {}
         
-        brand_id = task.get('payload', {}).get('brandId', 'unknown')
-        json_filename_temp = results_dir / f'brand_{brand_id}_temp.json'
+        try:
+            with open(json_filename, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"⚠️ Не удалось прочитать {json_filename}: {e}")
+            return {}
         
-        data = {
-            'updated_at': datetime.now().isoformat(),
-            'products': products
-        }
+        products = data.get('products', []) if isinstance(data, dict) else data
+        return {str(p['id']): ProductRecord.from_dict(p) for p in products if isinstance(p, dict) and p.get('id')}
+    
+    def listing_fingerprint(self, product):
+        return tuple(getattr(product, field) for field in self.LISTING_FIELDS)
+    
+    def print_incremental_stats(self, stats):
+        print(f"\n🔁 Инкрементальный режим: новых {stats['new']}, изменено {stats['changed']}, "
+              f"без изменений {stats['unchanged']}, удалено {stats['removed']}")
+    
+    async def enrich_products(self, detail_pages, products, detail_index=None, incremental_stats=None, http_client=None,
+                              fetch_stats=None):
+        reused = {}
+        if detail_index is not None:
+            for product in products:
+                cached = detail_index.get(product.id)
+                if cached is None:
+                    incremental_stats['new'] += 1
+                elif (self.listing_fingerprint(cached) != self.listing_fingerprint(product)
+                      or not cached.details or not cached.extra_images):
+                    incremental_stats['changed'] += 1
+                else:
+                    incremental_stats['unchanged'] += 1
+                    reused[product.id] = cached
+        
+        fetch_products = [p for p in products if p.id not in reused]
+        api_results = await self.fetch_details_concurrently(detail_pages, fetch_products, http_client, fetch_stats)
+        api_by_id = {p.id: api_data for p, api_data in zip(fetch_products, api_results)}
+        
+        name_products = []
+        for product in products:
+            cached = reused.get(product.id)
+            if cached is not None and cached.name == product.name and cached.name_ru:
+                product.name_ru = cached.name_ru
+            else:
+                name_products.append(product)
         
-        with open(json_filename_temp, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        translations = await self.translate_many_async(self.collect_translation_texts(name_products, api_results))
         
-        total_images = sum(len(p.get('all_images', [])) for p in products)
-        print(f"\n  ✓ Сохранено: {len(products)}/{total} товаров ({total_images} изображений)")
+        for product in name_products:
+            product.name_ru = self.translate_product_name(product.name, translations) if product.name else ''
+        
+        for product in products:
+            cached = reused.get(product.id)
+            if cached is not None:
+                details_data = {
+                    'details': cached.details,
+                    'all_images': cached.all_images,
+                    'city': cached.city,
+                    'article': cached.article
+                }
+            else:
+                details_data = self.parse_product_details(api_by_id.pop(product.id, None), product.sku, translations)
+            self.merge_product_details(product, details_data)
+        
+        image_mirror = self.get_image_mirror()
+        if image_mirror is not None:
+            await image_mirror.mirror_products(products)
+        
+        return products
     
-    def save_results(self, products, task):
+    def get_image_mirror(self):
+        if self.image_mirror is None and self.images_config.get('enabled', False) and not self.image_mirror_unavailable:
+            if load_httpx() is None:
+                print("⚠️ httpx не установлен, изображения не скачиваются")
+                self.image_mirror_unavailable = True
+                return None
+            
+            self.image_mirror = ImageMirror(
+                self.images_config.get('directory', 'products/images'),
+                max_connections=self.images_config.get('connections', 16),
+                timeout=self.images_config.get('timeout', 30.0),
+                retries=self.images_config.get('retries', 2),
+                revalidate=self.images_config.get('revalidate', False)
+            )
+        return self.image_mirror
+    
+    async def close_image_mirror(self):
+        if self.image_mirror is not None:
+            self.image_mirror.report()
+            await self.image_mirror.close()
+            self.image_mirror = None
+    
+    async def launch_browser(self, playwright):
+        print("Запуск браузера...")
+        return await playwright.chromium.launch(headless=True)
+    
+    async def new_task_context(self, browser, task, traffic, storage_state=None):
+        lean = self._task_option(task, 'lean', False)
+        viewport = {'width': 1920, 'height': 1080}
+        if lean:
+            viewport = self._task_option(task, 'lean_viewport', {'width': 1280, 'height': 720})
+        
+        context = await browser.new_context(
+            viewport=viewport,
+            user_agent='Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36',
+            storage_state=storage_state
+        )
+        context.on('requestfinished', traffic.on_request_finished)
+        
+        if lean:
+            blocked_types = set(self._task_option(task, 'blocked_resources', ['image', 'media', 'font']))
+            blocked_domains = self._task_option(task, 'blocked_domains', BLOCKED_DOMAINS)
+            
+            async def route_request(route):
+                request = route.request
+                host = urlparse(request.url).hostname or ''
+                if request.resource_type in blocked_types or any(
+                        host == domain or host.endswith('.' + domain) for domain in blocked_domains):
+                    traffic.blocked += 1
+                    metric_inc('network_blocked_total')
+                    await route.abort()
+                else:
+                    await route.continue_()
+            
+            await context.route('**/*', route_request)
+            print(f"Экономный режим: блокируются {', '.join(sorted(blocked_types))} и трекеры")
+        
+        return context
+    
+    def capture_product_lists(self, page, collector):
+        async def capture_response(response):
+            if 'productList' in response.url:
+                try:
+                    collector.add_response(await response.json())
+                except:
+                    pass
+                collector.notify_response()
+        
+        page.on('response', capture_response)
+    
+    async def parse_task(self, task, browser=None):
+        if browser is None:
+            async with async_playwright() as p:
+                browser = await self.launch_browser(p)
+                try:
+                    return await self.parse_task(task, browser)
+                finally:
+                    await browser.close()
+        
+        max_products = self.parsing_config['max_products']
+        brand_name = task.get('brand_name', 'Chanel')
+        brand_id = task.get('payload', {}).get('brandId', '223')
+        
+        print("\n" + "="*60)
+        print(f"Задача: {task['name']}")
+        print(f"Бренд: {brand_name} (ID: {brand_id})")
+        print(f"Максимум товаров: {max_products}")
+        print("="*60 + "\n")
+        
+        traffic = TrafficStats()
+        storage_state = self.load_storage_state()
+        context = await self.new_task_context(browser, task, traffic, storage_state)
+        
+        page = await context.new_page()
+        
+        collector = ProductCollector(brand_name)
+        timer = PhaseTimer()
+        self.capture_product_lists(page, collector)
+        
+        try:
+            with timer.phase('navigation'):
+                prepared = await self.start_session(context, page, task, storage_state)
+            await self.harvest_products(page, task, collector, brand_name, max_products, timer, prepared)
+            timer.report()
+            
+            captured_products = collector.products
+            
+            print(f"\n{'='*60}")
+            print(f"Всего перехвачено: {len(captured_products)} товаров {brand_name}")
+            print(f"{'='*60}\n")
+            
+            if not captured_products:
+                print("⚠️ Не удалось получить товары")
+                return []
+            
+            with timer.phase('details'):
+                processed_products = await self.process_captured(context, page, task, captured_products)
+            timer.report()
+            traffic.report()
+            return processed_products
+            
+        except Exception as e:
+            print(f"✗ Ошибка: {e}")
+            import traceback
+            traceback.print_exc()
+            return []
+        finally:
+            await context.close()
+
+    def result_paths(self, task):
         results_dir = Path('products')
         results_dir.mkdir(parents=True, exist_ok=True)
         
         brand_id = task.get('payload', {}).get('brandId', 'unknown')
+        return results_dir / f'brand_{brand_id}.json', results_dir / f'brand_{brand_id}_temp.jsonl'
+    
+    def iter_checkpoint(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+    
+    def repair_checkpoint(self, path):
+        with open(path, 'rb+') as f:
+            end = f.seek(0, os.SEEK_END)
+            if not end:
+                return
+            f.seek(end - 1)
+            if f.read(1) == b'\n':
+                return
+            
+            pos = end
+            while pos > 0:
+                step = min(65536, pos)
+                pos -= step
+                f.seek(pos)
+                newline = f.read(step).rfind(b'\n')
+                if newline != -1:
+                    f.truncate(pos + newline + 1)
+                    return
+            f.truncate(0)
+    
+    def iter_unique_products(self, products):
+        seen_ids = set()
+        for product in products:
+            product_id = str(product.get('id', ''))
+            if product_id in seen_ids:
+                continue
+            seen_ids.add(product_id)
+            yield product
+    
+    def write_products_json(self, path, updated_at, products):
+        count = 0
+        total_images = 0
+        
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('{\n')
+            f.write(f'  "updated_at": {json.dumps(updated_at)},\n')
+            f.write('  "products": [')
+            for product in products:
+                f.write(',\n' if count else '\n')
+                dumped = json.dumps(product, ensure_ascii=False, indent=2)
+                f.write('\n'.join('    ' + line for line in dumped.split('\n')))
+                count += 1
+                total_images += len(product.get('all_images', []))
+            f.write('\n  ]\n}' if count else ']\n}')
+            f.flush()
+            os.fsync(f.fileno())
+        
+        return count, total_images
+    
+    def save_batch(self, products, task, current, total):
+        _, json_filename_temp = self.result_paths(task)
         
-        json_filename = results_dir / f'brand_{brand_id}.json'
-        json_filename_temp = results_dir / f'brand_{brand_id}_temp.json'
+        with metric_timer('checkpoint_write_seconds'), open(json_filename_temp, 'a', encoding='utf-8') as f:
+            for product in products:
+                f.write(json.dumps(product.to_dict(), ensure_ascii=False) + '\n')
+            f.flush()
+        metric_inc('checkpoint_products_total', len(products))
+        
+        batch_images = sum(len(p.all_images) for p in products)
+        print(f"\n  ✓ Сохранено: {current}/{total} товаров (+{len(products)}, {batch_images} изображений)")
+    
+    def open_product_index(self):
+        if not self.index_config.get('enabled', True):
+            return None
+        try:
+            return ProductIndex(self.index_config.get('file', 'products/index.sqlite'))
+        except sqlite3.Error as e:
+            print(f"⚠️ Не удалось открыть индекс товаров: {e}")
+            return None
+    
+    def iter_indexed(self, products, index, brand_id, updated_at):
+        indexing = True
+        for product in products:
+            if indexing:
+                try:
+                    index.add(product, brand_id, updated_at)
+                except sqlite3.Error as e:
+                    print(f"⚠️ Индекс товаров не обновлен: {e}")
+                    index.rollback()
+                    indexing = False
+            yield product
+    
+    def save_results(self, products, task):
+        json_filename, json_filename_temp = self.result_paths(task)
+        json_filename_partial = json_filename.with_name(json_filename.name + '.partial')
         updated_at = datetime.now().isoformat()
+        write_started = time.perf_counter()
+        index = self.open_product_index()
         
-        if json_filename_temp.exists():
-            try:
-                with open(json_filename_temp, 'r', encoding='utf-8') as f:
-                    temp_data = json.load(f)
-                    if isinstance(temp_data, dict) and 'updated_at' in temp_data:
-                        updated_at = temp_data['updated_at']
-            except:
-                pass
+        try:
+            if json_filename_temp.exists():
+                updated_at = datetime.fromtimestamp(json_filename_temp.stat().st_mtime).isoformat()
+                products_iter = self.iter_unique_products(self.iter_checkpoint(json_filename_temp))
+            else:
+                products_iter = (product.to_dict() for product in products)
             
-            try:
-                shutil.copy2(json_filename_temp, json_filename)
-                
-                if json_filename.exists() and json_filename.stat().st_size > 0:
-                    json_filename_temp.unlink()
-                    print(f"\n✓ JSON: {json_filename}")
-                else:
-                    raise Exception("Файл не был скопирован или пуст")
-                    
-            except Exception as e:
-                print(f"\n✗ Ошибка при сохранении: {e}")
-                print(f"   Временный файл сохранен: {json_filename_temp}")
-                raise
-        else:
-            data = {
-                'updated_at': updated_at,
-                'products': products
-            }
-            with open(json_filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            if index is not None:
+                brand_id = task.get('payload', {}).get('brandId', 'unknown')
+                products_iter = self.iter_indexed(products_iter, index, brand_id, updated_at)
+            
+            count, total_images = self.write_products_json(json_filename_partial, updated_at, products_iter)
+            
+            os.replace(json_filename_partial, json_filename)
+            if index is not None:
+                index.commit()
+            metric_observe('final_write_seconds', time.perf_counter() - write_started)
+            if json_filename_temp.exists():
+                json_filename_temp.unlink()
             print(f"\n✓ JSON: {json_filename}")
+            
+        except Exception as e:
+            print(f"\n✗ Ошибка при сохранении: {e}")
+            if json_filename_temp.exists():
+                print(f"   Временный файл сохранен: {json_filename_temp}")
+            if index is not None:
+                index.rollback()
+            raise
+        finally:
+            if index is not None:
+                index.close()
         
-        total_images = sum(len(p.get('all_images', [])) for p in products)
         print(f"\n{'='*60}")
         print("📊 Итого:")
-        print(f"   Товаров: {len(products)}")
+        print(f"   Товаров: {count}")
         print(f"   Изображений (ссылок): {total_images}")
         print(f"   Обновлено: {updated_at}")
         print(f"   Файл: {json_filename}")
         print(f"{'='*60}")
         print("\n✅ Парсинг завершен!")
     
-    async def run(self, task_name=None):
+    async def run(self, task_name=None, watch=False):
         tasks = self.config['tasks']
         
         if task_name:
@@ -571,11 +2780,350 @@ class ZzerParser:
             print("\nСовет: Установите 'enabled': true в config.json или укажите задачу параметром --task")
             return
         
-        for task in tasks_to_run:
-            products = await self.parse_task(task)
+        try:
+            if watch:
+                await self.watch_tasks(tasks_to_run)
+            else:
+                await self.run_tasks(tasks_to_run)
+        finally:
+            await self.close_image_mirror()
+            self.print_translation_stats()
+            self.shutdown_translation()
+            self.translation_cache.close()
+    
+    async def run_tasks(self, tasks_to_run):
+        concurrency = max(1, self.parsing_config.get('task_concurrency', 1))
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async with async_playwright() as p:
+            browser = await self.launch_browser(p)
+            
+            async def run_task(task, parse):
+                async with semaphore:
+                    metrics = Metrics() if self.metrics_config.get('enabled', True) else None
+                    _current_metrics.set(metrics)
+                    try:
+                        products = await parse(task)
+                        
+                        if products:
+                            self.save_results(products, task)
+                    finally:
+                        if metrics is not None:
+                            self.export_metrics(metrics, task)
+            
+            async def parse_task(task):
+                return await self.parse_task(task, browser)
+            
+            try:
+                if self.parsing_config.get('multi_brand', False) and len(tasks_to_run) > 1:
+                    results = await self.run_multi_brand(browser, tasks_to_run, run_task)
+                else:
+                    results = await asyncio.gather(*(run_task(t, parse_task) for t in tasks_to_run),
+                                                   return_exceptions=True)
+            finally:
+                await browser.close()
+        
+        failed = [(task, result) for task, result in zip(tasks_to_run, results) if isinstance(result, Exception)]
+        if failed:
+            print(f"\n⚠️ Задач с ошибками: {len(failed)}/{len(tasks_to_run)}")
+            for task, error in failed:
+                print(f"  ✗ {task['name']}: {error}")
+    
+    async def watch_tasks(self, tasks_to_run):
+        semaphore = asyncio.Semaphore(max(1, self.parsing_config.get('task_concurrency', 1)))
+        
+        async with async_playwright() as p:
+            browser = await self.launch_browser(p)
+            try:
+                await asyncio.gather(*(self.watch_task(browser, task, semaphore) for task in tasks_to_run))
+            finally:
+                await browser.close()
+    
+    def changes_path(self, task):
+        json_filename, _ = self.result_paths(task)
+        return json_filename.with_name(f'{json_filename.stem}_changes.jsonl')
+    
+    def load_known_products(self, task):
+        known = {product_id: self.listing_fingerprint(product)
+                 for product_id, product in self.load_detail_index(task).items()}
+        
+        changes_path = self.changes_path(task)
+        if changes_path.exists():
+            self.repair_checkpoint(changes_path)
+            for event in self.iter_checkpoint(changes_path):
+                product_id = str(event.get('id', ''))
+                if event.get('event') == 'removed':
+                    known.pop(product_id, None)
+                elif event.get('product'):
+                    known[product_id] = self.listing_fingerprint(ProductRecord.from_dict(event['product']))
+                elif event.get('fingerprint'):
+                    known[product_id] = tuple(event['fingerprint'])
+        return known
+    
+    async def open_watch_session(self, browser, task):
+        storage_state = self.load_storage_state()
+        context = await self.new_task_context(browser, task, TrafficStats(), storage_state)
+        try:
+            page = await context.new_page()
+            await self.start_session(context, page, task, storage_state)
+            detail_pages = await self.open_detail_pages(context, page)
+        except BaseException:
+            await context.close()
+            raise
+        return context, page, detail_pages
+    
+    async def watch_task(self, browser, task, semaphore):
+        interval = self._task_option(task, 'watch_interval', 300)
+        full_every = self._task_option(task, 'watch_full_every', 12)
+        known = self.load_known_products(task)
+        session = None
+        since_full = 0
+        
+        print(f"👀 {task['name']}: проверка каждые {interval}с, известно товаров: {len(known)}")
+        
+        try:
+            while True:
+                started = time.monotonic()
+                async with semaphore:
+                    try:
+                        if session is None:
+                            session = await self.open_watch_session(browser, task)
+                        full = not known or (bool(full_every) and since_full >= full_every - 1)
+                        await self.poll_task(session, task, known, full)
+                        since_full = 0 if full else since_full + 1
+                    except Exception as e:
+                        print(f"✗ {task['name']}: ошибка проверки: {e}")
+                        if session is not None:
+                            await session[0].close()
+                            session = None
+                await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+        finally:
+            if session is not None:
+                await session[0].close()
+    
+    async def poll_recent_pages(self, page, task, known):
+        endpoint = self.api_config['endpoints'].get(task.get('endpoint', ''))
+        if not endpoint:
+            raise ValueError(f"endpoint '{task.get('endpoint')}' не найден в config.json")
+        
+        api_url = f"{self.api_config['base_url']}{endpoint}"
+        params = self.build_device_params()
+        listing = []
+        first_page = int(task.get('payload', {}).get('page', 1))
+        max_pages = self._task_option(task, 'watch_max_pages', 5)
+        
+        for page_no in range(first_page, first_page + max_pages):
+            payloads, page_size = self.build_list_payloads(task, page_no, 1)
+            results = await page.evaluate(LIST_PAGES_SCRIPT, {'url': api_url, 'params': params, 'payloads': payloads})
+            data = results[0] if results else None
+            if not isinstance(data, dict) or str(data.get('code', '')) != '100000':
+                raise RuntimeError(f"страница {page_no} не получена")
+            
+            items = [item for item in (data.get('data') or {}).get('list') or [] if isinstance(item, dict)]
+            listing.extend(items)
+            
+            if any(self.raw_product_id(item) in known for item in items) or len(items) < page_size:
+                break
+        return listing
+    
+    async def poll_listing(self, page, task, known, full=False):
+        brand_name = task.get('brand_name', 'Chanel')
+        if full:
+            collector = ProductCollector(brand_name)
+            harvested = await self.harvest_via_api(page, task, collector, float('inf'))
+            if not harvested or not collector.complete:
+                raise RuntimeError("список товаров получен не полностью")
+            listing = collector.products
+        else:
+            listing = await self.poll_recent_pages(page, task, known)
+        
+        collector = ProductCollector(brand_name)
+        fingerprints = {}
+        seen_ids = set()
+        for item in listing:
+            product_id = self.raw_product_id(item)
+            seen_ids.add(product_id)
+            fingerprint = self.listing_fingerprint(self.extract_product_data(item))
+            if known.get(product_id) != fingerprint and collector.add_items([item]):
+                fingerprints[product_id] = fingerprint
+        return collector.products, fingerprints, seen_ids
+    
+    async def poll_task(self, session, task, known, full=False):
+        _, page, detail_pages = session
+        items, fingerprints, seen_ids = await self.poll_listing(page, task, known, full)
+        removed = [product_id for product_id in known if product_id not in seen_ids] if full and known else []
+        
+        if not items and not removed:
+            return
+        
+        detected_at = datetime.now().isoformat()
+        if not known:
+            events = [{'event': 'baseline', 'detected_at': detected_at, 'id': self.raw_product_id(raw),
+                       'fingerprint': fingerprints[self.raw_product_id(raw)]} for raw in items]
+            print(f"👀 {task['name']}: базовый снимок, запомнено товаров: {len(events)}")
+        else:
+            brand_name = task.get('brand_name', 'Chanel')
+            products = [product for product in
+                        (self.extract_product_data(raw, brand_filter=brand_name) for raw in items)
+                        if product]
+            await self.enrich_products(detail_pages, products)
+            
+            counts = {'new': 0, 'changed': 0, 'removed': len(removed)}
+            events = []
+            for product in products:
+                previous = known.get(product.id)
+                event = {'event': 'new' if previous is None else 'changed', 'detected_at': detected_at, 'id': product.id}
+                if previous is not None:
+                    event['changes'] = {field: [old, new] for field, old, new in
+                                        zip(self.LISTING_FIELDS, previous, fingerprints[product.id]) if old != new}
+                event['product'] = product.to_dict()
+                events.append(event)
+                counts[event['event']] += 1
+            events.extend({'event': 'removed', 'detected_at': detected_at, 'id': product_id} for product_id in removed)
+            
+            if counts['new'] or counts['changed'] or counts['removed']:
+                print(f"🆕 {task['name']}: новых {counts['new']}, изменено {counts['changed']}, "
+                      f"удалено {counts['removed']} → {self.changes_path(task)}")
+        
+        with open(self.changes_path(task), 'a', encoding='utf-8') as f:
+            for event in events:
+                f.write(json.dumps(event, ensure_ascii=False) + '\n')
+            f.flush()
+        
+        known.update(fingerprints)
+        for product_id in removed:
+            known.pop(product_id, None)
+    
+    def multi_brand_listing(self):
+        listing = {'name': 'multi_brand', 'endpoint': 'product_list', 'payload': {'page': 1, 'size': 20}}
+        listing.update(self.parsing_config.get('multi_brand_listing', {}))
+        return listing
+    
+    async def harvest_multi_brand(self, context, page, listing, tasks, storage_state=None):
+        max_products = self.parsing_config['max_products']
+        collectors = {task['name']: ProductCollector(task.get('brand_name', 'Chanel'), limit=max_products)
+                      for task in tasks}
+        router = BrandRouter(list(collectors.values()), max_products,
+                             self.parsing_config.get('multi_brand_patience', 2000))
+        timer = PhaseTimer()
+        self.capture_product_lists(page, router)
+        
+        with timer.phase('navigation'):
+            prepared = await self.start_session(context, page, listing, storage_state)
+        await self.harvest_products(page, listing, router, None, max_products, timer, prepared)
+        timer.report()
+        
+        stopped = len(router) >= max_products
+        incomplete = set()
+        print(f"\n{'='*60}")
+        for i, task in enumerate(tasks):
+            note = ''
+            if stopped and not router.is_full(i) and router.is_exhausted(i):
+                incomplete.add(task['name'])
+                note = (f" (не встречался {router.seen - router.last_match[i]} товаров подряд, "
+                        f"будет собран отдельно)")
+            print(f"  {task.get('brand_name', 'Chanel')}: {len(collectors[task['name']])} товаров{note}")
+        print(f"{'='*60}\n")
+        return collectors, incomplete
+    
+    async def run_multi_brand(self, browser, tasks, run_task):
+        listing = self.multi_brand_listing()
+        
+        print("\n" + "="*60)
+        print(f"Общий сбор для {len(tasks)} брендов: {', '.join(t.get('brand_name', 'Chanel') for t in tasks)}")
+        print(f"Листинг: {listing['endpoint']}")
+        print("="*60 + "\n")
+        
+        traffic = TrafficStats()
+        storage_state = self.load_storage_state()
+        harvest_metrics = Metrics() if self.metrics_config.get('enabled', True) else None
+        context = await self.new_task_context(browser, listing, traffic, storage_state)
+        try:
+            page = await context.new_page()
+            token = _current_metrics.set(harvest_metrics)
+            try:
+                collectors, incomplete = await self.harvest_multi_brand(context, page, listing, tasks, storage_state)
+            except Exception as e:
+                print(f"✗ Ошибка общего сбора: {e}")
+                return [e] * len(tasks)
+            finally:
+                _current_metrics.reset(token)
+            
+            async def process_task(task):
+                captured_products = collectors[task['name']].products
+                metrics = _current_metrics.get()
+                if metrics is not None and harvest_metrics is not None:
+                    metrics.merge(harvest_metrics, scope='multi_brand')
+                if task['name'] in incomplete:
+                    print(f"\nЗадача: {task['name']}: общий список неполон, отдельный сбор бренда")
+                    collectors[task['name']].products.clear()
+                    return await self.parse_task(task, browser)
+                metric_inc('listing_products_total', len(captured_products), scope='multi_brand')
+                print(f"\nЗадача: {task['name']} ({len(captured_products)} товаров)")
+                if not captured_products:
+                    print("⚠️ Не удалось получить товары")
+                    return []
+                return await self.process_captured(context, page, task, captured_products)
             
-            if products:
-                self.save_results(products, task)
+            results = await asyncio.gather(*(run_task(t, process_task) for t in tasks), return_exceptions=True)
+            traffic.report()
+            return results
+        finally:
+            await context.close()
+    
+    def query_products(self, limit=50, **filters):
+        path = Path(self.index_config.get('file', 'products/index.sqlite'))
+        if not path.exists():
+            print(f"❌ Индекс товаров не найден: {path}")
+            print("\nСовет: индекс создается при сохранении результатов задачи")
+            return
+        
+        index = ProductIndex(path)
+        try:
+            started = time.perf_counter()
+            rows = index.find(limit=limit, **filters)
+            history = {row['id']: index.price_history(row['id']) for row in rows} if filters.get('product_id') else {}
+            elapsed = time.perf_counter() - started
+        finally:
+            index.close()
+        
+        print()
+        for row in rows:
+            price = f"¥{row['price_discount']:g}" if row['price_discount'] is not None else '-'
+            print(f"  {row['id']}  {row['brand']}  {row['article']}  {price}  {row['city'] or '-'}  "
+                  f"{row['condition'] or '-'}  {row['updated_at'][:19]}")
+            print(f"          {(row['name_ru'] or row['name'] or '')[:60]}")
+            for entry in history.get(row['id'], []):
+                price = f"¥{entry['price']:g}" if entry['price'] is not None else '-'
+                discount_price = f"¥{entry['price_discount']:g}" if entry['price_discount'] is not None else '-'
+                print(f"          {entry['updated_at'][:19]}  цена {price}, со скидкой {discount_price}")
+        
+        print(f"\nНайдено: {len(rows)} ({elapsed * 1000:.1f} мс)")
+    
+    def export_metrics(self, metrics, task):
+        try:
+            path = metrics.export(self.metrics_config.get('directory', 'products/metrics'), task)
+            print(f"📈 Метрики: {path}")
+        except Exception as e:
+            print(f"⚠️ Не удалось сохранить метрики: {e}")
+    
+    def print_translation_stats(self):
+        cache = self.translation_cache
+        total = cache.hits + cache.misses
+        if not total:
+            return
+        print(f"\n🌐 Кэш переводов: {cache.hits}/{total} попаданий ({cache.hit_rate:.1%})")
+        if self.glossary is not None and self.glossary.hits:
+            print(f"📖 Глоссарий: переведено локально {self.glossary.hits} строк, фраз в глоссарии {len(self.glossary)}")
+
+
+def run_shard_worker(config_file, task, queue_path, worker, shards):
+    zzer_parser = ZzerParser(config_file)
+    try:
+        asyncio.run(zzer_parser.shard_worker(task, queue_path, worker, shards))
+    finally:
+        zzer_parser.shutdown_translation()
+        zzer_parser.translation_cache.close()
 
 
 async def main():
@@ -583,10 +3131,22 @@ async def main():
     parser.add_argument('--config', default='config.json', help='Путь к файлу конфигурации')
     parser.add_argument('--task', help='Название задачи для выполнения (иначе выполняются все enabled)')
     parser.add_argument('--list', action='store_true', help='Показать список доступных задач')
+    parser.add_argument('--query', action='store_true', help='Поиск товаров в индексе (products/index.sqlite)')
+    parser.add_argument('--id', help='Для --query: ID товара (с историей цен)')
+    parser.add_argument('--sku', help='Для --query: SKU или артикул')
+    parser.add_argument('--serial', help='Для --query: серийный номер')
+    parser.add_argument('--city', help='Для --query: код города (например HKG)')
+    parser.add_argument('--brand', help='Для --query: бренд')
+    parser.add_argument('--price-changed', action='store_true', help='Для --query: только товары с изменением цены')
+    parser.add_argument('--limit', type=int, default=50, help='Для --query: максимум результатов')
+    parser.add_argument('--watch', action='store_true', help='Следить за новыми товарами, не завершаясь')
+    parser.add_argument('--shards', type=int, help='Число процессов-воркеров для обработки карточек одного бренда')
     
     args = parser.parse_args()
     
     zzer_parser = ZzerParser(args.config)
+    if args.shards:
+        zzer_parser.parsing_config['shards'] = args.shards
     
     if args.list:
         print("\nДоступные задачи в config.json:\n")
@@ -599,8 +3159,23 @@ async def main():
             print()
         return
     
-    await zzer_parser.run(args.task)
+    if args.query:
+        zzer_parser.query_products(
+            limit=args.limit,
+            product_id=args.id,
+            sku=args.sku,
+            serial=args.serial,
+            city=args.city,
+            brand=args.brand,
+            price_changed=args.price_changed
+        )
+        return
+    
+    await zzer_parser.run(args.task, watch=args.watch)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\nОстановлено")
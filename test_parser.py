@@ -0,0 +1,593 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import contextlib
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import parser as zzer_module
+from bench import Fixtures, FakeApiPage, StubTranslator, create_parser
+from parser import GLOSSARY, DetailHttpClient, Glossary, ImageMirror, ProductRecord, ShardQueue
+
+
+class RecordingApiPage(FakeApiPage):
+    def __init__(self, fixtures):
+        super().__init__(fixtures)
+        self.detail_ids = []
+    
+    async def evaluate(self, script, arg=None):
+        if arg and 'items' in arg:
+            self.detail_ids.extend(params['id'] for params in arg['items'])
+        return await super().evaluate(script, arg)
+
+
+class ParserTestCase(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory(prefix='zzer-test-')
+        self.cwd = os.getcwd()
+        os.chdir(self.workdir.name)
+        self.zzer = create_parser(self.workdir.name, StubTranslator())
+        self.task = dict(self.zzer.config['tasks'][0])
+    
+    def tearDown(self):
+        self.zzer.shutdown_translation()
+        self.zzer.translation_cache.close()
+        os.chdir(self.cwd)
+        self.workdir.cleanup()
+    
+    def quiet(self, coro_or_func, *args):
+        with contextlib.redirect_stdout(io.StringIO()):
+            if asyncio.iscoroutine(coro_or_func):
+                return asyncio.run(coro_or_func)
+            return coro_or_func(*args)
+
+
+class CheckpointTest(ParserTestCase):
+    def write_checkpoint(self, content):
+        _, path = self.zzer.result_paths(self.task)
+        path.write_bytes(content.encode('utf-8'))
+        return path
+    
+    def test_repair_drops_torn_tail(self):
+        path = self.write_checkpoint('{"id": "1"}\n{"id": "2"}\n{"id": "3", "na')
+        self.zzer.repair_checkpoint(path)
+        
+        self.assertEqual(path.read_text(encoding='utf-8'), '{"id": "1"}\n{"id": "2"}\n')
+        self.assertEqual([p['id'] for p in self.zzer.iter_checkpoint(path)], ['1', '2'])
+    
+    def test_repair_keeps_complete_file(self):
+        path = self.write_checkpoint('{"id": "1"}\n{"id": "2"}\n')
+        self.zzer.repair_checkpoint(path)
+        
+        self.assertEqual(path.read_text(encoding='utf-8'), '{"id": "1"}\n{"id": "2"}\n')
+    
+    def test_repair_truncates_single_torn_line(self):
+        path = self.write_checkpoint('{"id": "1", "na')
+        self.zzer.repair_checkpoint(path)
+        
+        self.assertEqual(path.read_bytes(), b'')
+    
+    def test_resume_after_torn_write(self):
+        fixtures = Fixtures.synthesize(5)
+        raws = [item for page in fixtures.list_pages for item in page['data']['list']]
+        done = self.zzer.extract_product_data(raws[0])
+        torn = json.dumps(self.zzer.extract_product_data(raws[1]).to_dict(), ensure_ascii=False)
+        self.write_checkpoint(json.dumps(done.to_dict(), ensure_ascii=False) + '\n' + torn[:len(torn) // 2])
+        
+        self.zzer.parsing_config['max_products'] = len(raws)
+        page = RecordingApiPage(fixtures)
+        products = self.quiet(self.zzer.process_products(None, page, self.task, list(raws)))
+        self.quiet(self.zzer.save_results, products, self.task)
+        
+        json_filename, json_filename_temp = self.zzer.result_paths(self.task)
+        with open(json_filename, 'r', encoding='utf-8') as f:
+            saved = [p['id'] for p in json.load(f)['products']]
+        
+        self.assertEqual(sorted(saved), sorted(str(raw['product']['id']) for raw in raws))
+        self.assertNotIn(done.id, page.detail_ids)
+        self.assertIn(str(raws[1]['product']['id']), page.detail_ids)
+        self.assertFalse(json_filename_temp.exists())
+
+
+
+class IncrementalTest(ParserTestCase):
+    def run_task(self, fixtures, raws):
+        page = RecordingApiPage(fixtures)
+        products = self.quiet(self.zzer.process_products(None, page, self.task, list(raws)))
+        self.quiet(self.zzer.save_results, products, self.task)
+        return page, {product.id: product for product in products}
+    
+    def test_product_saved_without_details_is_fetched_again(self):
+        fixtures = Fixtures.synthesize(3)
+        raws = [item for page in fixtures.list_pages for item in page['data']['list']]
+        ids = [str(raw['product']['id']) for raw in raws]
+        self.zzer.parsing_config['max_products'] = len(raws)
+        self.task['incremental'] = True
+        
+        broken = Fixtures(fixtures.list_pages, {k: v for k, v in fixtures.details.items() if k != ids[1]})
+        _, first = self.run_task(broken, raws)
+        self.assertEqual(first[ids[1]].details, {})
+        
+        page, second = self.run_task(fixtures, raws)
+        
+        self.assertEqual(page.detail_ids, [ids[1]])
+        self.assertTrue(second[ids[1]].details)
+        self.assertTrue(second[ids[1]].extra_images)
+        self.assertEqual(second[ids[0]].details, first[ids[0]].details)
+
+
+class WatchTest(ParserTestCase):
+    def paged(self, fixtures, items):
+        return Fixtures([{'code': 100000, 'data': {'list': items[start:start + 20]}}
+                         for start in range(0, len(items) + 1, 20)], fixtures.details)
+    
+    def read_events(self):
+        with open(self.zzer.changes_path(self.task), encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+    
+    def test_poll_reports_new_changed_and_removed(self):
+        fixtures = Fixtures.synthesize(46)
+        items = [item for page in fixtures.list_pages for item in page['data']['list']]
+        fresh, kept, gone = items[-1], items[:-1], items[40]
+        self.zzer.parsing_config['max_products'] = len(kept)
+        products = self.quiet(self.zzer.process_products(None, FakeApiPage(fixtures), self.task, list(kept)))
+        self.quiet(self.zzer.save_results, products, self.task)
+        
+        changed = json.loads(json.dumps(kept[2]))
+        changed['product']['price'] += 100
+        listing = [fresh] + [changed if item is kept[2] else item for item in kept if item is not gone]
+        page = RecordingApiPage(self.paged(fixtures, listing))
+        known = self.zzer.load_known_products(self.task)
+        
+        self.quiet(self.zzer.poll_task((None, page, [page]), self.task, known))
+        events = self.read_events()
+        
+        self.assertEqual([(e['event'], e['id']) for e in events],
+                         [('new', fresh['product']['id']), ('changed', changed['product']['id'])])
+        self.assertEqual(list(events[1]['changes']), ['price_discount'])
+        self.assertEqual(sorted(page.detail_ids), sorted([fresh['product']['id'], changed['product']['id']]))
+        
+        self.quiet(self.zzer.poll_task((None, page, [page]), self.task, known, True))
+        events = self.read_events()[2:]
+        
+        self.assertEqual([(e['event'], e['id']) for e in events], [('removed', gone['product']['id'])])
+        self.assertNotIn(gone['product']['id'], known)
+        self.assertEqual(known, self.zzer.load_known_products(self.task))
+
+
+class ProductIndexTest(ParserTestCase):
+    def ids(self, rows):
+        return sorted(row['id'] for row in rows)
+    
+    def test_find_and_price_history_after_repeated_saves(self):
+        fixtures = Fixtures.synthesize(6)
+        raws = [item for page in fixtures.list_pages for item in page['data']['list']]
+        self.zzer.parsing_config['max_products'] = len(raws)
+        products = self.quiet(self.zzer.process_products(None, FakeApiPage(fixtures), self.task, list(raws)))
+        self.quiet(self.zzer.save_results, products, self.task)
+        
+        changed = products[0]
+        self.assertTrue(changed.city)
+        old_price = float(changed.price_discount)
+        changed.price_discount = str(old_price + 100)
+        self.quiet(self.zzer.save_results, products, self.task)
+        
+        index = self.zzer.open_product_index()
+        self.addCleanup(index.close)
+        
+        self.assertEqual(self.ids(index.find(price_changed=True)), [changed.id])
+        self.assertEqual(self.ids(index.find(sku=changed.sku)), [changed.id])
+        self.assertEqual(self.ids(index.find(sku=changed.article)), [changed.id])
+        self.assertEqual(self.ids(index.find(city=changed.city.lower())),
+                         sorted(p.id for p in products if p.city == changed.city))
+        self.assertEqual(len(index.find()), len(products))
+        
+        history = index.price_history(changed.id)
+        self.assertEqual([row['price_discount'] for row in history], [old_price, old_price + 100])
+        self.assertLess(history[0]['updated_at'], history[1]['updated_at'])
+        self.assertEqual(len(index.price_history(products[1].id)), 1)
+
+
+class GlossaryTest(unittest.TestCase):
+    def setUp(self):
+        self.glossary = Glossary(GLOSSARY)
+    
+    def test_prefers_longest_phrase(self):
+        self.assertEqual(self.glossary.segment('小羊皮'), [('小羊皮', 'Кожа ягненка')])
+        self.assertEqual(self.glossary.translate('小羊皮'), 'Кожа ягненка')
+    
+    def test_minimal_segmentation_beats_greedy_match(self):
+        glossary = Glossary({'小牛': 'Теленок', '牛皮': 'Воловья кожа', '小': 'Маленький'})
+        
+        self.assertEqual(glossary.segment('小牛皮'), [('小', 'Маленький'), ('牛皮', 'Воловья кожа')])
+    
+    def test_punctuation_and_numbers(self):
+        self.assertEqual(self.glossary.translate('防尘袋、盒子'), 'Пылезащитный мешок, Коробка')
+        self.assertEqual(self.glossary.translate('25厘米'), '25 см')
+        self.assertEqual(self.glossary.translate('黑色（小牛皮）'), 'Черный (Телячья кожа)')
+    
+    def test_uncovered_text_is_not_translated(self):
+        hits = self.glossary.hits
+        
+        self.assertIsNone(self.glossary.segment('防尘袋和盒子'))
+        self.assertIsNone(self.glossary.translate('防尘袋和盒子'))
+        self.assertEqual(self.glossary.hits, hits)
+    
+    def test_learn_skips_long_known_and_mixed_phrases(self):
+        glossary = Glossary({'盒子': 'Коробка'})
+        glossary.learn([('手提包', 'Сумка'), ('盒子', 'Ящик'), ('斜挎包包', 'Сумка через плечо'),
+                        ('Boy包', 'Boy'), ('链', 'Цепь')], max_chars=3)
+        
+        self.assertEqual(glossary.phrases, {'盒子': 'Коробка', '手提包': 'Сумка', '链': 'Цепь'})
+        self.assertEqual(glossary.translate('手提包+盒子'), 'Сумка+Коробка')
+
+
+class GlossaryLookupTest(ParserTestCase):
+    def test_batch_lookup_uses_glossary_before_translator(self):
+        translator = self.zzer._get_translator()
+        translations = asyncio.run(self.zzer.translate_many_async(['防尘袋、盒子', '经典款']))
+        
+        self.assertEqual(translations, {'防尘袋、盒子': 'Пылезащитный мешок, Коробка', '经典款': 'ru:经典款'})
+        self.assertEqual(translator.calls, 1)
+    
+    def test_single_lookup_never_calls_translator(self):
+        translator = self.zzer._get_translator()
+        self.zzer.store_translations({'经典款': 'Классика'})
+        
+        self.assertEqual(self.zzer.translate_chinese_to_russian('经典款'), 'Классика')
+        self.assertEqual(self.zzer.translate_chinese_to_russian('防尘袋'), 'Пылезащитный мешок')
+        self.assertEqual(self.zzer.translate_chinese_to_russian('手提包'), '手提包')
+        self.assertEqual(translator.calls, 0)
+    
+    def test_param_names_do_not_count_as_glossary_hits(self):
+        glossary = self.zzer.get_glossary()
+        hits = glossary.hits
+        
+        self.assertEqual(self.zzer.translate_param('Size'), 'Size')
+        self.assertEqual(self.zzer.translate_param('防尘袋'), 'Пылезащитный мешок')
+        self.assertEqual(glossary.hits, hits)
+        
+        asyncio.run(self.zzer.translate_many_async(['防尘袋、盒子', 'Size']))
+        self.assertEqual(glossary.hits, hits + 1)
+
+
+class ShardQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory(prefix='zzer-test-')
+        self.path = Path(self.workdir.name) / 'queue.sqlite'
+    
+    def tearDown(self):
+        self.workdir.cleanup()
+    
+    def open_queue(self, lease_seconds=300):
+        queue = ShardQueue(self.path, lease_seconds)
+        self.addCleanup(queue.close)
+        return queue
+    
+    def fill(self, queue, count):
+        queue.add((str(i), {'id': i}) for i in range(count))
+    
+    def test_lease_is_exclusive_and_ordered(self):
+        queue = self.open_queue()
+        self.fill(queue, 5)
+        
+        first = queue.lease('shard-0', 3)
+        second = queue.lease('shard-1', 3)
+        
+        self.assertEqual([item_id for item_id, _ in first], ['0', '1', '2'])
+        self.assertEqual([item_id for item_id, _ in second], ['3', '4'])
+        self.assertEqual(first[0][1], {'id': 0})
+        self.assertEqual(queue.lease('shard-2', 3), [])
+        self.assertEqual(queue.counts(), {'pending': 0, 'leased': 5, 'done': 0})
+    
+    def test_expired_lease_is_taken_over(self):
+        queue = self.open_queue(lease_seconds=0.05)
+        self.fill(queue, 2)
+        queue.lease('shard-0', 2)
+        
+        self.assertEqual(queue.lease('shard-1', 2), [])
+        time.sleep(0.1)
+        self.assertEqual([item_id for item_id, _ in queue.lease('shard-1', 2)], ['0', '1'])
+        
+        queue.complete([('0', {'id': '0'}), ('1', None)])
+        self.assertEqual(queue.counts(), {'pending': 0, 'leased': 0, 'done': 2})
+        self.assertEqual(list(queue.iter_results()), [{'id': '0'}])
+    
+    def test_release_returns_crashed_worker_items(self):
+        queue = self.open_queue()
+        self.fill(queue, 4)
+        queue.lease('shard-0', 2)
+        queue.lease('shard-1', 2)
+        
+        self.assertEqual(queue.release('shard-0'), 2)
+        self.assertEqual([item_id for item_id, _ in queue.lease('shard-2', 4)], ['0', '1'])
+        self.assertEqual(queue.counts(), {'pending': 0, 'leased': 4, 'done': 0})
+    
+    def test_reopen_resumes_and_ignores_duplicates(self):
+        queue = self.open_queue()
+        self.fill(queue, 3)
+        queue.lease('shard-0', 1)
+        queue.complete([('0', {'id': '0'})], 'shard-0/1', {'fetch': {'retries': 1}})
+        queue.close()
+        
+        queue = self.open_queue()
+        self.fill(queue, 4)
+        
+        self.assertEqual(queue.counts(), {'pending': 3, 'leased': 0, 'done': 1})
+        self.assertEqual([item_id for item_id, _ in queue.lease('shard-1', 5)], ['1', '2', '3'])
+        self.assertEqual(queue.take_worker_stats(), [{'fetch': {'retries': 1}}])
+        self.assertEqual(queue.take_worker_stats(), [])
+    
+    def test_remove_deletes_database_files(self):
+        queue = self.open_queue()
+        self.fill(queue, 1)
+        queue.close()
+        queue.remove()
+        
+        self.assertEqual(list(Path(self.workdir.name).iterdir()), [])
+
+
+class StubServer:
+    def __init__(self, handler):
+        self.requests = []
+        self.files = {}
+        self.drop = set()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self.server.stub = self
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+    
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+    
+    def __enter__(self):
+        self.thread.start()
+        return self
+    
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+    
+    def send(self, status, body=b'', headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+
+class DetailApiHandler(StubHandler):
+    def do_GET(self):
+        product_id = parse_qs(urlparse(self.path).query).get('id', [''])[0]
+        stub = self.server.stub
+        stub.requests.append(product_id)
+        attempt = stub.requests.count(product_id)
+        
+        if product_id.startswith('reject'):
+            return self.send(200, json.dumps({'code': 40100, 'msg': 'sign error'}).encode())
+        if product_id.startswith('busy') and attempt == 1:
+            return self.send(200, json.dumps({'code': 42900, 'msg': 'too many requests'}).encode())
+        if product_id.startswith('limit') and attempt == 1:
+            return self.send(429)
+        self.send(200, json.dumps({'code': 100000, 'data': {'detail': {'id': product_id}}}).encode())
+
+
+class StaticImageHandler(StubHandler):
+    def do_GET(self):
+        stub = self.server.stub
+        stub.requests.append((self.path, self.headers.get('If-None-Match'), self.headers.get('Range')))
+        data = stub.files.get(self.path)
+        if data is None:
+            return self.send(404)
+        
+        etag = '"' + hashlib.md5(data).hexdigest() + '"'
+        if self.headers.get('If-None-Match') == etag:
+            return self.send(304, headers={'ETag': etag})
+        
+        status = 200
+        headers = {'ETag': etag, 'Content-Type': 'image/jpeg'}
+        start = 0
+        if self.headers.get('Range') and self.headers.get('If-Range') == etag:
+            start = int(self.headers['Range'].split('=')[1].split('-')[0])
+            status = 206
+            headers['Content-Range'] = f'bytes {start}-{len(data) - 1}/{len(data)}'
+        body = data[start:]
+        
+        if self.path in stub.drop:
+            stub.drop.discard(self.path)
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body[:len(body) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.send(status, body, headers)
+
+
+class ImageMirrorTest(unittest.TestCase):
+    def setUp(self):
+        if zzer_module.load_httpx() is None:
+            self.skipTest('httpx не установлен')
+        self.workdir = tempfile.TemporaryDirectory(prefix='zzer-test-')
+        self.store = Path(self.workdir.name) / 'images'
+        self.image = bytes(range(256)) * 64
+    
+    def tearDown(self):
+        self.workdir.cleanup()
+    
+    def mirror(self, urls, **options):
+        async def run():
+            mirror = ImageMirror(self.store, retries=0, **options)
+            try:
+                return mirror, [await mirror.mirror(url) for url in urls]
+            finally:
+                await mirror.close()
+        
+        return asyncio.run(run())
+    
+    def test_identical_content_is_stored_once_and_reused(self):
+        with StubServer(StaticImageHandler) as server:
+            server.files = {'/a.jpg': self.image, '/b.jpg': self.image}
+            mirror, paths = self.mirror([server.url + '/a.jpg', server.url + '/b.jpg'])
+            again, reused = self.mirror([server.url + '/a.jpg'])
+        
+        self.assertEqual(paths[0], paths[1])
+        self.assertEqual(Path(paths[0]).read_bytes(), self.image)
+        self.assertEqual(Path(paths[0]).name, hashlib.sha256(self.image).hexdigest() + '.jpg')
+        self.assertEqual(mirror.downloaded, 2)
+        self.assertEqual((again.reused, reused), (1, paths[:1]))
+        self.assertEqual(len(server.requests), 2)
+    
+    def test_revalidation_uses_etag_and_304(self):
+        with StubServer(StaticImageHandler) as server:
+            server.files = {'/a.jpg': self.image}
+            _, paths = self.mirror([server.url + '/a.jpg'])
+            mirror, revalidated = self.mirror([server.url + '/a.jpg'], revalidate=True)
+        
+        self.assertEqual(revalidated, paths)
+        self.assertEqual((mirror.not_modified, mirror.downloaded), (1, 0))
+        self.assertEqual(server.requests[1][1], '"' + hashlib.md5(self.image).hexdigest() + '"')
+    
+    def test_dropped_transfer_resumes_with_range(self):
+        with StubServer(StaticImageHandler) as server:
+            server.files = {'/a.jpg': self.image}
+            server.drop = {'/a.jpg'}
+            failed, paths = self.mirror([server.url + '/a.jpg'])
+            resumed, resumed_paths = self.mirror([server.url + '/a.jpg'])
+        
+        self.assertEqual((failed.failed, paths), (1, [None]))
+        self.assertEqual(server.requests[1][2], f'bytes={len(self.image) // 2}-')
+        self.assertEqual(resumed.bytes, len(self.image) - len(self.image) // 2)
+        self.assertEqual(Path(resumed_paths[0]).read_bytes(), self.image)
+    
+    def test_failed_revalidation_keeps_stored_copy(self):
+        with StubServer(StaticImageHandler) as server:
+            server.files = {'/a.jpg': self.image}
+            _, paths = self.mirror([server.url + '/a.jpg'])
+            
+            server.files = {'/a.jpg': self.image[::-1]}
+            server.drop = {'/a.jpg'}
+            failed, kept = self.mirror([server.url + '/a.jpg'], revalidate=True)
+            reused, reused_paths = self.mirror([server.url + '/a.jpg'])
+        
+        self.assertEqual((failed.failed, kept), (1, paths))
+        self.assertEqual((reused.reused, reused_paths), (1, paths))
+        self.assertEqual(len(server.requests), 2)
+
+
+class ImageMirrorSetupTest(ParserTestCase):
+    def test_missing_httpx_does_not_change_config(self):
+        self.zzer.images_config['enabled'] = True
+        with mock.patch.object(zzer_module, 'load_httpx', return_value=None):
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                self.assertIsNone(self.zzer.get_image_mirror())
+                self.assertIsNone(self.zzer.get_image_mirror())
+        
+        self.assertTrue(self.zzer.images_config['enabled'])
+        self.assertEqual(output.getvalue().count('httpx'), 1)
+
+
+class DetailHttpTest(ParserTestCase):
+    def setUp(self):
+        super().setUp()
+        if zzer_module.load_httpx() is None:
+            self.skipTest('httpx не установлен')
+        self.zzer.parsing_config['throttle_codes'] = [42900]
+        self.zzer.parsing_config['retry_backoff'] = 0.01
+    
+    def create_client(self, server, fallback_after=5):
+        return DetailHttpClient(server.url + '/product/api/v1/product/detail', {}, [], fallback_after=fallback_after,
+                                throttle_codes=self.zzer.parsing_config['throttle_codes'])
+    
+    def fetch(self, server, product_ids, fallback_after=5):
+        async def run():
+            client = self.create_client(server, fallback_after)
+            try:
+                results = [await client.fetch_with_status({'id': product_id}) for product_id in product_ids]
+            finally:
+                await client.close()
+            return client, results
+        
+        return asyncio.run(run())
+    
+    def test_success(self):
+        with StubServer(DetailApiHandler) as server:
+            client, results = self.fetch(server, ['ok-1'])
+        
+        self.assertEqual(results[0][0], 200)
+        self.assertEqual(results[0][1]['data']['detail']['id'], 'ok-1')
+        self.assertEqual(client.rejected, 0)
+    
+    def test_rejection_returns_body_and_falls_back(self):
+        with StubServer(DetailApiHandler) as server:
+            client, results = self.fetch(server, ['reject-1', 'reject-2', 'reject-3'], fallback_after=2)
+        
+        self.assertEqual(results[0], (200, {'code': 40100, 'msg': 'sign error'}))
+        self.assertEqual(results[2], (0, None))
+        self.assertEqual(self.zzer.classify_detail_response(*results[0]), 'failed')
+        self.assertTrue(client.disabled)
+        self.assertEqual(server.requests, ['reject-1', 'reject-2'])
+    
+    def test_throttle_code_is_not_rejection(self):
+        with StubServer(DetailApiHandler) as server:
+            client, results = self.fetch(server, ['busy-1', 'limit-1'])
+        
+        self.assertEqual(results[0], (200, {'code': 42900, 'msg': 'too many requests'}))
+        self.assertEqual(results[1], (429, None))
+        self.assertEqual([self.zzer.classify_detail_response(*result) for result in results], ['throttled'] * 2)
+        self.assertEqual(client.rejected, 0)
+    
+    def test_concurrent_fetch_retries_throttled_and_falls_back_rejected(self):
+        page = RecordingApiPage(Fixtures([], {'reject-1': {'code': 100000, 'data': {'detail': {'id': 'reject-1'}}}}))
+        products = [ProductRecord(product_id) for product_id in ['ok-1', 'busy-1', 'limit-1', 'reject-1']]
+        limiter = self.zzer.rate_limiter
+        acquire = limiter.acquire
+        acquired = []
+        
+        async def counting_acquire(count=1):
+            acquired.append(count)
+            await acquire(count)
+        
+        limiter.acquire = counting_acquire
+        
+        async def run():
+            client = self.create_client(server)
+            try:
+                return await self.zzer.fetch_details_concurrently([page], products, client)
+            finally:
+                await client.close()
+        
+        with StubServer(DetailApiHandler) as server:
+            results = self.quiet(run())
+        
+        self.assertEqual([data['data']['detail']['id'] for data in results], ['ok-1', 'busy-1', 'limit-1', 'reject-1'])
+        self.assertEqual(page.detail_ids, ['reject-1'])
+        self.assertEqual(self.zzer.rate_limiter.throttled, 2)
+        self.assertEqual(sum(acquired), len(server.requests) + len(page.detail_ids))
+        self.assertEqual(sorted(server.requests), ['busy-1', 'busy-1', 'limit-1', 'limit-1', 'ok-1', 'reject-1'])
+
+
+if __name__ == '__main__':
+    unittest.main()